@@ -0,0 +1,35 @@
+"""
+Entry classification throughput on the demo logs, against the Entry from before classify() in
+benchmarks/baseline_entry.py.
+
+    python -m benchmarks.bench_entry [--repeat 20]
+"""
+import argparse
+import time
+from classes.utils import load_entries_from_csv
+from classes.entry import Entry
+from benchmarks.baseline_entry import Entry as BaselineEntry
+
+
+def bench_entry(lines: list[str], rounds=3, entry=Entry):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for line in lines:
+            entry(line)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20, help="times the demo logs are concatenated")
+    args = parser.parse_args()
+
+    lines = []
+    for path in ["data/demo1.csv", "data/demo2.csv"]:
+        lines.extend(load_entries_from_csv(path, return_as_entry=False))
+    lines = lines * args.repeat
+    baseline, current = bench_entry(lines, entry=BaselineEntry), bench_entry(lines)
+    print(f"baseline Entry: {len(lines)} lines, {baseline:,.0f} lines/s")
+    print(f"Entry: {len(lines)} lines, {current:,.0f} lines/s ({current / baseline:.2f}x)")
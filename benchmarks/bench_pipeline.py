@@ -0,0 +1,125 @@
+"""
+Time and peak memory of every pipeline stage on a synthetic log, see benchmarks/synthetic.py.
+
+    python -m benchmarks.bench_pipeline [--hands 100000] [--players 6] [--seed 0] [--pretty 1000]
+    python -m benchmarks.bench_pipeline --log data/demo1.csv
+
+Peak memory is how far the resident set grew during the stage, read from the high-water mark that
+Linux lets a process reset. Elsewhere the stage is run a second time under tracemalloc instead,
+which only sees Python allocations and is much slower. --no-memory skips it.
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from tabulate import tabulate
+from classes import EntryTable, Hand, Session
+from classes.utils import iter_entries_from_csv, hand_segmentor
+from benchmarks.synthetic import generate_log
+
+QUERIES = [("PFR", "!3-Bet"), ("3-Bet|4-Bet", "Donk"), ("C-Bet",), ("!Call", "Raise|Check-Raise"), ("2-Barrel", "3-Barrel"),
+           ("5-Bet|5-Bet+",)]
+
+
+def _status(field: str) -> int:
+    with open("/proc/self/status", "r") as f:
+        return next(int(line.split()[1]) << 10 for line in f if line.startswith(field))
+
+
+def _reset_peak() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def measure(stage, memory=True):
+    """
+    run stage, returning its result, the seconds it took and, with memory, the peak bytes it added
+    """
+    gc.collect()
+    rss = _reset_peak() and memory
+    baseline = _status("VmRSS") if rss else 0
+    start = time.perf_counter()
+    result = stage()
+    elapsed = time.perf_counter() - start
+    peak = _status("VmHWM") - baseline if rss else None
+    if memory and not rss:
+        gc.collect()
+        tracemalloc.start()
+        stage()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def build_hands(segments):
+    hands, errored = [], []
+    for hand in segments:
+        try:
+            hands.append(Hand(hand))
+        except KeyError:
+            errored.append(hand)
+    return hands, errored
+
+
+def bench_pipeline(path, pretty=1000, memory=True, own_id="Player1"):
+    """
+    one row per stage: name, items processed, seconds, items per second and peak MiB
+    """
+    rows = []
+
+    def run(name, stage, count):
+        result, elapsed, peak = measure(stage, memory)
+        n = count(result)
+        rows.append([name, n, elapsed, n / elapsed if elapsed else float("inf"), peak / (1 << 20) if peak is not None else None])
+        return result
+
+    lines = run("read csv", lambda: list(iter_entries_from_csv(path, return_as_entry=False)), len)
+    table = run("Entry parsing", lambda: EntryTable(lines), len)
+    segments, admin_entries = run("hand_segmentor", lambda: hand_segmentor(table, return_admin=True), lambda result: len(result[0]))
+    hands, errored = run("Hand construction", lambda: build_hands(segments), lambda result: len(result[0]))
+
+    session = Session(own_id=own_id, interactive=False)
+    session._add_hands(hands, admin_entries, [])
+
+    def log_stats():
+        session.log_session_stats()
+        session.update_player_profiles()
+        return session
+
+    run("log_session_stats", log_stats, len)
+
+    def find_hands():
+        session._action_index = None
+        return [session.find_hands(*query) for query in QUERIES]
+
+    run("find_hands", find_hands, len)
+    run("_pretty_history", lambda: [hand._pretty_history for hand in session.hands[:pretty]], len)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hands", type=int, default=100000, help="hands in the synthetic log")
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log", help="benchmark this pokernow csv log instead of a synthetic one")
+    parser.add_argument("--pretty", type=int, default=1000, help="hands rendered by _pretty_history")
+    parser.add_argument("--no-memory", action="store_true", help="only time the stages")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.log
+        if path is None:
+            path = os.path.join(directory, "synthetic.csv")
+            start = time.perf_counter()
+            generate_log(path, args.hands, args.players, args.seed)
+            print(f"Generated {args.hands} hands ({os.path.getsize(path) / (1 << 20):.1f} MiB) in {time.perf_counter() - start:.2f}s")
+        rows = bench_pipeline(path, args.pretty, not args.no_memory)
+    print(tabulate(rows, headers=["Stage", "Items", "Seconds", "Items/s", "Peak MiB"], floatfmt=(None, None, ".3f", ",.0f", ".1f"),
+                   missingval="-"))
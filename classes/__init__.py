@@ -1,12 +1,22 @@
 from .entry import Entry
+from .table import EntryTable
 from .hand import Hand
 from .player import Player
 from .session import Session
+from .cache import HandCache
+from .store import HandStore
+from .accumulator import StatAccumulator
+from .instrumentation import Instrumentation
 
 __all__ = [
     'Entry',
+    'EntryTable',
     'Hand',
     'PlayerSelf',
     'Player',
     'Session',
+    'HandCache',
+    'HandStore',
+    'StatAccumulator',
+    'Instrumentation',
 ]
\ No newline at end of file
@@ -0,0 +1,96 @@
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+from .session import Session
+from .export import _import_pyarrow
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m classes",
+                                     description="parse a directory of pokernow csv logs without prompts and write the "
+                                                 "player profiles, raw stats and accumulated winnings")
+    parser.add_argument("logs", help="directory of pokernow csv logs, or a single log")
+    parser.add_argument("--own-id", required=True, help="your profile name")
+    parser.add_argument("--name-map", help="json file mapping log names to profile names, unmapped names keep their own profile")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, every core by default")
+    parser.add_argument("--output", default="output", help="directory to write the tables to (default: output)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="table format (default: csv)")
+    parser.add_argument("--cache", help="HandCache directory, so unchanged logs are not parsed again")
+    parser.add_argument("--quiet", action="store_true", help="do not report progress")
+    parser.add_argument("--profile", action="store_true", help="report the time spent in every stage and the slowest hands")
+    return parser.parse_args(argv)
+
+
+class _Progress:
+    """
+    one status line on stderr with files and hands loaded so far and the throughput
+    """
+    def __init__(self, n_files, quiet=False) -> None:
+        self.n_files = n_files
+        self.quiet = quiet
+        self.files = 0
+        self.hands = 0
+        self.start = time.perf_counter()
+
+    def __call__(self, path, n_hands):
+        self.files += 1
+        self.hands += n_hands
+        if not self.quiet:
+            elapsed = time.perf_counter() - self.start
+            print(f"\r[{self.files}/{self.n_files} files] {self.hands} hands, {self.hands / max(elapsed, 1e-9):.0f} hands/s",
+                  end="", file=sys.stderr, flush=True)
+
+    def done(self, stage, count, unit):
+        elapsed = time.perf_counter() - self.start
+        if not self.quiet:
+            print(f"\r{stage} {count} {unit} in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f} {unit}/s)" + " " * 20, file=sys.stderr)
+        self.start = time.perf_counter()
+
+
+def _write(table: pd.DataFrame, directory, name, fmt):
+    path = os.path.join(directory, f"{name}.{fmt}")
+    if fmt == "parquet":
+        table.columns = [str(column) for column in table.columns]
+        table.to_parquet(path)
+    else:
+        table.to_csv(path)
+    return path
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    if args.format == "parquet":
+        _import_pyarrow()
+    if os.path.isdir(args.logs):
+        paths = sorted(os.path.join(args.logs, name) for name in os.listdir(args.logs) if name.endswith(".csv"))
+    else:
+        paths = [args.logs]
+    assert paths, f"No csv logs found in {args.logs}"
+
+    session = Session(own_id=args.own_id, interactive=False)
+    if args.profile:
+        session.instrument()
+    if args.name_map:
+        session.load_name_map(args.name_map)
+    progress = _Progress(len(paths), args.quiet)
+    session.load_files(paths, workers=args.workers, cache=args.cache, progress=progress)
+    progress.done("Loaded", len(session), "hands")
+    session.log_session_stats()
+    session.update_player_profiles()
+    progress.done("Logged", len(session), "hands")
+
+    os.makedirs(args.output, exist_ok=True)
+    for name, table in (("players_profile", session.players_profile), ("players_raw_stats", session.players_raw_stats),
+                        ("winnings", session.winnings())):
+        path = _write(table, args.output, name, args.format)
+        if not args.quiet:
+            print(f"Wrote {path}", file=sys.stderr)
+    if args.profile:
+        print(session.instrumentation.stages().to_string(float_format="{:.4g}".format), file=sys.stderr)
+        print(session.instrumentation.slowest_hands().to_string(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import json
+import numpy as np
+from typing import Callable
+from .hand import STAT_COLUMNS
+from .player import Player
+
+
+def _seat_key(record: dict) -> int:
+    # of the records of aliases of one profile in the same hand the lowest seat is kept, an unknown seat first
+    return -1 if record["position"] is None else record["position"]
+
+
+class StatAccumulator:
+    """
+    raw stat counters (STAT_COLUMNS: raw_attributes(), attack, defend, n_hands_tracked) and revealed-hand
+    records per player, detached from any hand
+
+    accumulators of separate shards (files, workers, months) merge associatively into the one a single
+    Session over all of them would have produced, and round-trip through JSON. players() turns the result
+    into profiled Players without touching a hand again.
+    """
+    def __init__(self, counts: dict[str, np.ndarray] = None, hands: dict[str, dict] = None) -> None:
+        self.counts = {name: np.asarray(count, dtype=np.int64) for name, count in (counts or dict()).items()}
+        self.hands = {name: dict(records) for name, records in (hands or dict()).items()}
+
+    @classmethod
+    def from_players(cls, players: dict[str, Player]) -> "StatAccumulator":
+        return cls({name: np.array([player._counter(stat) for stat in STAT_COLUMNS], dtype=np.int64) for name, player in players.items()},
+                   {name: player.hands for name, player in players.items()})
+
+    def merge(self, other: "StatAccumulator") -> "StatAccumulator":
+        """
+        a new accumulator holding the counts of both and the union of their hand records
+        """
+        counts = dict(self.counts)
+        for name, count in other.counts.items():
+            counts[name] = counts[name] + count if name in counts else count
+        hands = {name: dict(records) for name, records in self.hands.items()}
+        for name, records in other.hands.items():
+            hands.setdefault(name, dict()).update(records)
+        return StatAccumulator(counts, hands)
+
+    def add_counts(self, counts: dict[str, np.ndarray]):
+        for name, count in counts.items():
+            self.counts[name] = self.counts[name] + count if name in self.counts else np.asarray(count, dtype=np.int64)
+
+    def add_record(self, name: str, hand_id: str, record: dict):
+        self.hands.setdefault(name, dict())[hand_id] = record
+
+    def group(self, key: Callable[[str], str]) -> "StatAccumulator":
+        """
+        a new accumulator with the counts and hand records of every name summed under key(name),
+        e.g. raw identities under their profile. Where several names of one key have a record of the
+        same hand, the one of the lowest seat is kept as Session does when logging
+        """
+        grouped = StatAccumulator()
+        for name, count in self.counts.items():
+            grouped.add_counts({key(name): count})
+        for name, records in self.hands.items():
+            kept = grouped.hands.setdefault(key(name), dict())
+            for hand_id, record in records.items():
+                if hand_id not in kept or _seat_key(record) < _seat_key(kept[hand_id]):
+                    kept[hand_id] = record
+        return grouped
+
+    def players(self) -> dict[str, Player]:
+        """
+        a profiled Player per accumulated name
+        """
+        players = dict()
+        for name in dict.fromkeys(list(self.counts) + list(self.hands)):
+            player = Player(name)
+            for stat, value in zip(STAT_COLUMNS, self.counts.get(name, np.zeros(len(STAT_COLUMNS), dtype=np.int64)).tolist()):
+                setattr(player, stat if stat == "n_hands_tracked" else f"_{stat}", value)
+            player.set_hands(self.hands.get(name, dict()))
+            player.update_profile()
+            players[name] = player
+        return players
+
+    def to_dict(self) -> dict:
+        return {"columns": list(STAT_COLUMNS),
+                "counts": {name: count.tolist() for name, count in self.counts.items()},
+                "hands": {name: {hand_id: {"hand": list(record["hand"]), "position": record["position"],
+                                           "n_players": record["n_players"], "actions": list(record["actions"])}
+                                 for hand_id, record in records.items()}
+                          for name, records in self.hands.items()}}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "StatAccumulator":
+        # counters saved under another STAT_COLUMNS layout are realigned by name, missing ones start at 0
+        index = [state["columns"].index(stat) if stat in state["columns"] else None for stat in STAT_COLUMNS]
+        counts = {name: [count[i] if i is not None else 0 for i in index] for name, count in state["counts"].items()}
+        return cls(counts, state["hands"])
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "StatAccumulator":
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
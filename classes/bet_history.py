@@ -0,0 +1,159 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+
+STAGES = ("preflop", "flop", "turn", "river", "end")
+STAGE_CODES = {stage: code for code, stage in enumerate(STAGES)}
+ACTIONS = (None, "start", "Call", "Donk", "Bet", "Raise", "Check-Raise", "PFR", "3-Bet", "4-Bet", "5-Bet", "5-Bet+",
+           "C-Bet", "2-Barrel", "3-Barrel")
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+# flags stored with the stage code of a layer
+_RESET = 0x40
+_HAS_FOLD = 0x80
+_STAGE_MASK = 0x3f
+# bytes per layer in codes: stage and flags, seat of the actor, action code, seat + 1 of the described player
+_STRIDE = 4
+
+
+class BetHistory(Mapping):
+    """
+    append-only action log of a hand, a few bytes per betting layer
+
+    layer 0 holds the blinds and antes, every call, bet or raise adds a layer recording only who put in
+    how much (and whether it opened a new street), folds are attached to the layer they followed and
+    the hand closes with an "end" layer. Players are stored as seats into names. The per-player bets at
+    any layer are materialized on demand, so it still reads like the old
+    {index: {"stage", "bet", "fold", "descriptor"}} dict. The layers that open a street are indexed,
+    so one layer is rebuilt from the start of its street only.
+    """
+    __slots__ = ("names", "blinds", "codes", "amounts", "folds", "resets")
+
+    def __init__(self, players: list[str]) -> None:
+        self.names = players
+        self.blinds = array("q", bytes(8 * len(players)))
+        self.codes = bytearray(_STRIDE)
+        self.amounts = array("q", [0])
+        self.folds = array("I")
+        self.resets = array("I")
+
+    def _seat(self, name: str) -> int:
+        try:
+            return self.names.index(name)
+        except ValueError:
+            # someone who only posted, kept after the players like the old bet dicts did
+            self.names = self.names + [name]
+            self.blinds.append(0)
+            return len(self.names) - 1
+
+    def post(self, name: str, amount: int):
+        self.blinds[self._seat(name)] = amount
+        self.codes[0] |= _HAS_FOLD
+        if self.folds:
+            self.folds = array("I", (fold for fold in self.folds if fold >> 8))
+
+    def append(self, stage: str, name: str, amount: int, reset=False):
+        """
+        name's bet on this street is now amount, reset when it is the first bet after a new street was dealt
+        """
+        self.codes.extend((STAGE_CODES[stage] | _RESET * reset | _HAS_FOLD, self._seat(name), 0, 0))
+        if reset:
+            self.resets.append(len(self.amounts))
+        self.amounts.append(amount)
+
+    def fold(self, name: str):
+        if not self.codes[-_STRIDE] & _HAS_FOLD:
+            raise KeyError("fold")
+        self.folds.append((len(self) - 1) << 8 | self._seat(name))
+
+    def end(self):
+        self.codes.extend((STAGE_CODES["end"], 0, 0, 0))
+        self.amounts.append(0)
+
+    def describe(self, i: int, name: str, action: str):
+        self.codes[i * _STRIDE + 2] = ACTION_CODES[action]
+        self.codes[i * _STRIDE + 3] = 0 if name is None else self._seat(name) + 1
+
+    def stage(self, i: int) -> str:
+        return STAGES[self.codes[i * _STRIDE] & _STAGE_MASK]
+
+    def descriptor(self, i: int) -> dict:
+        code, actor = self.codes[i * _STRIDE + 2], self.codes[i * _STRIDE + 3]
+        if not code:
+            raise KeyError("descriptor")
+        return {"name": self.names[actor - 1] if actor else None, "action": ACTIONS[code]}
+
+    def descriptors(self) -> list[dict]:
+        """
+        the {"name", "action"} of every layer but the end, without materializing any bets
+        """
+        return [self.descriptor(i) for i in range(len(self) - 1)]
+
+    def walk(self):
+        """
+        yield (index, stage, folded names, bet) for every layer, bet is one running dict updated in place
+
+        folded names is None on the layers without a fold list (the end, and layer 0 before any blind)
+        """
+        names = self.names
+        bet = dict(zip(names, self.blinds))
+        n_folds, f = len(self.folds), 0
+        for i in range(len(self)):
+            flags = self.codes[i * _STRIDE]
+            stage = STAGES[flags & _STAGE_MASK]
+            if i and stage != "end":
+                if flags & _RESET:
+                    for name in bet:
+                        bet[name] = 0
+                bet[names[self.codes[i * _STRIDE + 1]]] = self.amounts[i]
+            folded = [] if flags & _HAS_FOLD else None
+            while f < n_folds and self.folds[f] >> 8 == i:
+                folded.append(names[self.folds[f] & 0xff])
+                f += 1
+            yield i, stage, folded, bet
+
+    def _history(self, i: int, stage: str, folded: list, bet: dict) -> dict:
+        if stage == "end":
+            return dict(stage="end")
+        history = dict(stage=stage, bet=dict(bet))
+        if folded is not None:
+            history["fold"] = folded
+        if self.codes[i * _STRIDE + 2]:
+            history["descriptor"] = self.descriptor(i)
+        return history
+
+    def items(self):
+        for i, stage, folded, bet in self.walk():
+            yield i, self._history(i, stage, folded, bet)
+
+    def values(self):
+        for _, history in self.items():
+            yield history
+
+    def __getitem__(self, i: int) -> dict:
+        if not isinstance(i, int) or not 0 <= i < len(self):
+            raise KeyError(i)
+        flags = self.codes[i * _STRIDE]
+        stage = STAGES[flags & _STAGE_MASK]
+        if stage == "end":
+            return dict(stage="end")
+        # replay the bets from the layer that opened the street, the blinds when it is preflop
+        street = bisect_right(self.resets, i)
+        start = self.resets[street - 1] if street else 0
+        bet = dict.fromkeys(self.names, 0) if street else dict(zip(self.names, self.blinds))
+        for j in range(max(start, 1), i + 1):
+            bet[self.names[self.codes[j * _STRIDE + 1]]] = self.amounts[j]
+        folded = None
+        if flags & _HAS_FOLD:
+            f = bisect_left(self.folds, i << 8)
+            folded = []
+            while f < len(self.folds) and self.folds[f] >> 8 == i:
+                folded.append(self.names[self.folds[f] & 0xff])
+                f += 1
+        return self._history(i, stage, folded, bet)
+
+    def __iter__(self):
+        return iter(range(len(self)))
+
+    def __len__(self):
+        return len(self.amounts)
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+import pickle
+
+# bump whenever a change to Entry / Hand parsing changes what gets pickled, so stale artifacts are rebuilt
+PARSER_VERSION = 7
+
+
+class HandCache:
+    """
+    on-disk cache of parsed logs, one pickled artifact per log keyed by content hash, parser version and
+    whether the hands were built lazy
+
+    manifest.json records every log already processed (hash, size, mtime and artifact), so unchanged
+    files are not even re-hashed. Artifacts are pickles: only point this at a directory you trust.
+    """
+    def __init__(self, directory=".pnparser_cache") -> None:
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = dict()
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def digest(self, path: str) -> str:
+        """
+        content hash of a log, reusing the manifest hash while its size and mtime are unchanged
+        """
+        stat = os.stat(path)
+        record = self.manifest.get(os.path.abspath(path))
+        if record and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+            return record["sha256"]
+        return self.file_hash(path)
+
+    def _artifact(self, digest: str, lazy=False) -> str:
+        return os.path.join(self.directory, f"{digest}{'-lazy' if lazy else ''}-v{PARSER_VERSION}.pkl")
+
+    def load(self, digest: str, lazy=False):
+        """
+        the cached (hands, admin entries, errored hands) of a log, None when it has to be parsed
+        """
+        artifact = self._artifact(digest, lazy)
+        if not os.path.exists(artifact):
+            return None
+        with open(artifact, "rb") as f:
+            return pickle.load(f)
+
+    def store(self, path: str, digest: str, result: tuple, lazy=False):
+        artifact = self._artifact(digest, lazy)
+        with open(artifact + ".tmp", "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(artifact + ".tmp", artifact)
+
+        stat = os.stat(path)
+        self.manifest[os.path.abspath(path)] = {
+            "sha256": digest,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "parser_version": PARSER_VERSION,
+            "artifact": os.path.basename(artifact),
+            "n_hands": len(result[0]),
+        }
+        with open(self.manifest_path + ".tmp", "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
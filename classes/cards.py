@@ -0,0 +1,39 @@
+from typing import Union
+from phevaluator.card import Card
+
+# cards are plain ints 0-51 in phevaluator's encoding: rank * 4 + suit
+RANKS = "23456789TJQKA"
+SUITS = "cdhs"
+SUIT_SYMBOLS = (u"♣", u"♦", u"♥", u"♠")
+RED_SUITS = (False, True, True, False)
+
+# every card a pokernow log can print, e.g. "10♦" -> 33
+CARD_LOOKUP = {f"{rank if rank != 'T' else '10'}{symbol}": rank_index * 4 + suit_index
+               for rank_index, rank in enumerate(RANKS)
+               for suit_index, symbol in enumerate(SUIT_SYMBOLS)}
+DESCRIPTIONS = [f"{rank}{suit}" for rank in RANKS for suit in SUITS]
+
+
+def parse_cards(cards: str) -> list[int]:
+    """
+    parse a comma separated pokernow card list, e.g. "A♥, 10♦", into card ints
+    """
+    if " " in cards:
+        cards = cards.replace(" ", "")
+    return [CARD_LOOKUP[card] for card in cards.split(",")]
+
+
+def to_id(card: Union[int, str, Card]) -> int:
+    return card if isinstance(card, int) else Card.to_id(card)
+
+
+def rank_of(card: int) -> int:
+    return card // 4
+
+
+def suit_of(card: int) -> int:
+    return card % 4
+
+
+def describe_card(card: int) -> str:
+    return DESCRIPTIONS[card]
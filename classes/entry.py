@@ -1,107 +1,136 @@
 import re
-from phevaluator.card import Card
+from .cards import parse_cards
+
+# keyword -> descriptor, in priority order: the first keyword found anywhere in the line wins
+DESCRIPTOR_LOOKUP = {
+    "checks": "check",
+    "calls": "call",
+    "folds": "fold",
+    "bets": "bet",
+    "raises": "raise",
+    "Uncalled": "uncalled",
+    "Undealt cards": "rabbit",
+    "shows a": "show",
+    "ending hand": "end",
+    "starting hand": "start",
+    "Player stacks": "stack count",
+    "collected": "collect",
+    "Your hand": "own hand",
+    "ante": "ANTE",
+    "posts a small": "SB",
+    "posts a big": "BB",
+    "Flop": "flop",
+    "Turn": "turn",
+    "River": "river",
+    "stack from": "add stack",
+    "adding": "add stack",
+    "approved the player": "join",
+    "enqueued": "terminate",
+}
+_KEYWORDS = tuple(DESCRIPTOR_LOOKUP.items())
+_NAME_PATTERN = re.compile(r'"([^"]*)"')
+_NUMBER_PATTERN = re.compile(r"(?<!')\b\d+\b(?!')")
+_BRACKET_PATTERN = re.compile(r'\[([^\[\]]+)\]')
+_HAND_ID_PATTERN = re.compile(r'\(id:\s*(\w+)\)')
+_STACK_PATTERN = re.compile(r'\((\d+)\)')
+
+
+def _parse_amount(entry: str):
+    return int(_NUMBER_PATTERN.search(entry).group())
+
+
+def _parse_board(entry: str):
+    return Entry._parse_cards(_BRACKET_PATTERN.search(entry).group(1).replace(" ", ""))
+
+
+def _parse_own_hand(entry: str):
+    return Entry._parse_cards(entry.split("is ")[1].replace(" ", ""))
+
+
+def _parse_show(entry: str):
+    return Entry._parse_cards(entry.split(" a ")[1][:-1].replace(" ", ""))
+
+
+def _parse_hand_id(entry: str):
+    return _HAND_ID_PATTERN.search(entry).group(1)
+
+
+def _parse_stack_count(entry: str):
+    return Entry._parse_stacks(entry)
+
+
+def _parse_stack_change(entry: str):
+    nums = list(map(int, _NUMBER_PATTERN.findall(entry)))
+    return int(nums[1] - nums[0]) if len(nums) == 2 else nums[0]
+
+
+_META_PARSERS = {
+    "call": _parse_amount,
+    "raise": _parse_amount,
+    "bet": _parse_amount,
+    "uncalled": _parse_amount,
+    "collect": _parse_amount,
+    "ANTE": _parse_amount,
+    "SB": _parse_amount,
+    "BB": _parse_amount,
+    "join": _parse_amount,
+    "flop": _parse_board,
+    "turn": _parse_board,
+    "river": _parse_board,
+    "rabbit": _parse_board,
+    "own hand": _parse_own_hand,
+    "show": _parse_show,
+    "start": _parse_hand_id,
+    "stack count": _parse_stack_count,
+    "add stack": _parse_stack_change,
+}
+
+
+def classify(entry: str):
+    """
+    tokenize a raw pokernow log line once and return its (name, descriptor, meta)
+    """
+    descriptor = "admin"
+    for key, _descriptor in _KEYWORDS:
+        if key in entry:
+            descriptor = _descriptor
+            break
+    name = [full_name.split(" @ ") for full_name in _NAME_PATTERN.findall(entry)]
+    parser = _META_PARSERS.get(descriptor)
+    return name, descriptor, parser(entry) if parser else None
+
 
 class Entry:
     def __init__(self, entry: str) -> None:
         self.raw = entry
-        self.name = self._get_name(self.raw)
-        self.descriptor = self._define_descriptor()
-        self.meta = self._get_meta()
+        self.name, self.descriptor, self.meta = classify(entry)
         self.stage = None
         self.pot = None
-        
+
     @staticmethod
     def _get_name(entry: str, return_hash=True):
-        full_names = re.findall(r'"([^"]*)"', entry)
+        full_names = _NAME_PATTERN.findall(entry)
         return [full_name.split(" @ ") for full_name in full_names] if return_hash else [[full_name.split(" @ ")[0]] for full_name in full_names]
-        
+
     def _define_descriptor(self):
-        descriptor_lookup = {
-            "checks": "check",
-            "calls": "call",
-            "folds": "fold",
-            "bets": "bet",
-            "raises": "raise",
-            "Uncalled": "uncalled",
-            "Undealt cards": "rabbit",
-            "shows a": "show",
-            "ending hand": "end",
-            "starting hand": "start",
-            "Player stacks": "stack count",
-            "collected": "collect",
-            "Your hand": "own hand",
-            "ante": "ANTE",
-            "posts a small": "SB",
-            "posts a big": "BB",
-            "Flop": "flop",
-            "Turn": "turn",
-            "River": "river",
-            "stack from": "add stack",
-            "adding": "add stack",
-            "approved the player": "join",
-            "enqueued": "terminate",
-        }
-        for key, descriptor in descriptor_lookup.items():
-            if key in self.raw:
-                return descriptor
-        return "admin"
+        return classify(self.raw)[1]
 
     def _get_meta(self):
-        if self.descriptor in ['call', 'raise', 'bet', 'uncalled', 'collect', 'ANTE', 'SB', 'BB', 'join']:
-            return int(re.search(r"(?<!')\b\d+\b(?!')", self.raw).group())
-        elif self.descriptor in ['flop', 'turn', 'river', 'rabbit']:
-            cards = re.search(r'\[([^\[\]]+)\]', self.raw).group()[1:-1].replace(" ", "")
-            return self._parse_cards(cards)
-        elif self.descriptor == "own hand":
-            cards = self.raw.split("is ")[1].replace(" ", "")
-            return self._parse_cards(cards)
-        elif self.descriptor == "show":
-            cards = self.raw.split(" a ")[1][:-1].replace(" ", "")
-            return self._parse_cards(cards)
-        elif self.descriptor == "start":
-            return re.search(r'\(id:\s*(\w+)\)', self.raw).group(1)
-        elif self.descriptor == "stack count":
-            return self._parse_stacks(self.raw)
-        elif self.descriptor == "add stack":
-            nums = list(map(int, re.findall(r"(?<!')\b\d+\b(?!')", self.raw)))
-            return int(nums[1] - nums[0]) if len(nums) == 2 else nums[0]
-        else:
-            return None
-    
+        parser = _META_PARSERS.get(self.descriptor)
+        return parser(self.raw) if parser else None
+
     @staticmethod
-    def _parse_cards(cards:str) -> list[Card]:
-        unicode_suit_lookup = {
-            2660: 's',
-            2665: 'h',
-            2666: 'd',
-            2663: 'c',
-            }
-        
-        if " " in cards:
-            cards = cards.replace(" ", "")
-        if "," in cards:
-                cards = cards.split(",")
-        else:
-            cards = [cards]
-        
-        parsed_cards = []
-        for card in cards:
-            suit = card[-1]
-            rank = card[:-1]
-            rank = rank if len(rank) != 2 else "T"
-            parsed_cards.append(Card(f"{rank}{unicode_suit_lookup[int(hex(ord(suit))[2:].zfill(4))]}"))
-        return parsed_cards
+    def _parse_cards(cards:str) -> list[int]:
+        return parse_cards(cards)
 
     @staticmethod
     def _parse_stacks(entry:str) -> dict:
         stacks = {}
-        pattern = re.compile(r'"([^"]*)"')  # Matches everything between double quotes
-
         for player_stat in entry.split(": ")[1].split('|'):
-            player_name = pattern.findall(player_stat)[0].split(" @ ")[0]  # Extract player name from the string
-            stack = int(re.findall(r'\((\d+)\)', player_stat)[0])  # Extract player stats from the string
+            player_name = _NAME_PATTERN.findall(player_stat)[0].split(" @ ")[0]  # Extract player name from the string
+            stack = int(_STACK_PATTERN.findall(player_stat)[0])  # Extract player stats from the string
             stacks[player_name] = stack
         return stacks
-            
+
     def __str__(self) -> str:
         return self.raw
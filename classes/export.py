@@ -0,0 +1,129 @@
+import os
+import numpy as np
+from array import array
+from .bet_history import STAGES, ACTIONS, _STAGE_MASK, _STRIDE
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError as e:
+        raise ImportError("Exporting to Arrow or Parquet requires pyarrow, install it with `pip install pyarrow`") from e
+
+
+def action_columns(hands: list) -> dict[str, np.ndarray]:
+    """
+    one row per betting layer of every hand but the closing one, as flat columns:
+    hand (index into hands), layer, stage (index into STAGES), seat and player (index into the returned
+    names, -1 for the opening blinds row), action (index into ACTIONS, 0 when undescribed), described
+    (player the descriptor is about, -1 if none), amount (the player's bet on the street after acting,
+    the posted blinds and antes on the opening row), pot_before, and the players who folded after the
+    layer as fold_offsets into folded
+    """
+    names = dict()
+    codes, amounts, lookup = bytearray(), array("q"), array("q")
+    bases, lengths, pot_before, fold_counts, folds = array("q"), array("q"), array("q"), array("q"), array("q")
+    for hand in hands:
+        bet_history = hand.bet_history
+        n = len(bet_history) - 1
+        bases.append(len(lookup))
+        lengths.append(n)
+        lookup.extend(names.setdefault(name, len(names)) for name in bet_history.names)
+        codes += bet_history.codes[:-_STRIDE]
+        amounts.append(sum(bet_history.blinds))
+        amounts.extend(bet_history.amounts[1:n])
+
+        completed, street, previous_stage = 0, 0, "preflop"
+        for i, stage, folded, bet in bet_history.walk():
+            if stage == "end":
+                break
+            pot_before.append(completed + street)
+            if stage != previous_stage:
+                completed += street
+            street, previous_stage = sum(bet.values()), stage
+            if folded:
+                folds.extend(names[name] for name in folded)
+            fold_counts.append(len(folded) if folded else 0)
+
+    def column(values):
+        return np.frombuffer(values, dtype=np.int64) if values else np.zeros(0, dtype=np.int64)
+
+    lengths, lookup = column(lengths), column(lookup)
+    codes = np.frombuffer(bytes(codes), dtype=np.uint8).reshape(-1, _STRIDE).astype(np.int64)
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    bases = np.repeat(column(bases), lengths)
+    layer = np.arange(len(codes)) - starts
+    seat = np.where(layer > 0, codes[:, 1], -1)
+    columns = {"hand": np.repeat(np.arange(len(hands)), lengths), "layer": layer, "stage": codes[:, 0] & _STAGE_MASK,
+               "seat": seat, "player": np.where(seat >= 0, lookup[bases + seat], -1), "action": codes[:, 2],
+               "described": np.where(codes[:, 3] > 0, lookup[bases + codes[:, 3] - 1], -1), "amount": column(amounts),
+               "pot_before": column(pot_before), "folded": column(folds),
+               "fold_offsets": np.concatenate(([0], np.cumsum(column(fold_counts))))}
+    columns["names"] = list(names)
+    return columns
+
+
+def hand_columns(hands: list) -> dict:
+    """
+    one row per hand: id, blinds, ante, players, pot, winners with what they collected, and the board
+    of the first and second run as card ints (see cards.py)
+    """
+    columns = {column: [] for column in ("id", "sb", "bb", "ante", "num_players", "players", "pot", "winners",
+                                         "collected", "board", "second_board")}
+    for hand in hands:
+        first, second = hand.board
+        for column, value in (("id", hand.id), ("sb", hand.sb), ("bb", hand.bb), ("ante", hand.ante),
+                              ("num_players", hand.num_players), ("players", list(hand.players)), ("pot", hand.pot),
+                              ("winners", list(hand.winner)), ("collected", list(hand.winner.values())),
+                              ("board", first), ("second_board", second)):
+            columns[column].append(value)
+    return columns
+
+
+def to_arrow(hands: list):
+    """
+    the (actions, hands) pyarrow tables of hands, see action_columns and hand_columns. Stages, actions and
+    player names are dictionary encoded
+    """
+    pa = _import_pyarrow()
+    columns = action_columns(hands)
+    names = pa.array(columns["names"], type=pa.string())
+    ids = pa.array([hand.id for hand in hands], type=pa.string())
+
+    def encode(indices, dictionary):
+        return pa.DictionaryArray.from_arrays(pa.array(indices.astype(np.int32), mask=indices < 0), dictionary)
+
+    actions = pa.table({
+        "hand_id": encode(columns["hand"], ids),
+        "layer": pa.array(columns["layer"].astype(np.int32)),
+        "stage": encode(columns["stage"], pa.array(STAGES)),
+        "seat": pa.array(columns["seat"].astype(np.int16), mask=columns["seat"] < 0),
+        "player": encode(columns["player"], names),
+        "action": encode(columns["action"] - 1, pa.array(ACTIONS[1:])),
+        "described_player": encode(columns["described"], names),
+        "amount": pa.array(columns["amount"]),
+        "pot_before": pa.array(columns["pot_before"]),
+        "folded": pa.ListArray.from_arrays(pa.array(columns["fold_offsets"].astype(np.int32)),
+                                           encode(columns["folded"], names)),
+    })
+    hand_table = hand_columns(hands)
+    hand_table = pa.table({
+        **{column: pa.array(hand_table[column]) for column in ("id", "sb", "bb", "ante", "num_players", "pot")},
+        **{column: pa.array(hand_table[column], type=pa.list_(pa.string())) for column in ("players", "winners")},
+        "collected": pa.array(hand_table["collected"], type=pa.list_(pa.int64())),
+        **{column: pa.array(hand_table[column], type=pa.list_(pa.uint8())) for column in ("board", "second_board")},
+    })
+    return actions, hand_table
+
+
+def to_parquet(hands: list, directory: str):
+    """
+    write the tables of to_arrow to actions.parquet and hands.parquet in directory
+    """
+    _import_pyarrow()
+    import pyarrow.parquet as pq
+    os.makedirs(directory, exist_ok=True)
+    actions, hand_table = to_arrow(hands)
+    pq.write_table(actions, os.path.join(directory, "actions.parquet"))
+    pq.write_table(hand_table, os.path.join(directory, "hands.parquet"))
@@ -0,0 +1,105 @@
+import csv
+import os
+import time
+from typing import Callable
+from .entry import Entry
+from .hand import Hand
+
+
+class LogFollower:
+    """
+    incrementally ingest a log file that is still being written, one entry per line in chronological order
+
+    each poll() only parses the bytes appended since the previous poll. Entries of the hand in progress
+    are held back until the next "starting hand" line arrives, since voluntary shows and undealt cards
+    are written after "ending hand", then the hand is added to the session and only that hand is logged,
+    so keeping players_profile current costs O(new hands) rather than O(session). Call flush() once the
+    game is over to complete the last hand. A log that is truncated or replaced is read again from the
+    start, skipping the hands the session already has.
+    """
+    def __init__(self, session, path: str, csv_format=None) -> None:
+        self.session = session
+        self.path = path
+        self.csv_format = path.endswith(".csv") if csv_format is None else csv_format
+        self.offset = 0
+        self._partial_line = b""
+        self._header_skipped = not self.csv_format
+        self._current_hand = None
+        self._admin_entries = []
+        self._inode = None
+
+    def poll(self) -> list[Hand]:
+        """
+        read what was appended since the last poll, returns the hands completed by it
+        """
+        stat = os.stat(self.path)
+        if stat.st_size < self.offset or self._inode not in (None, stat.st_ino):
+            # the file was truncated or replaced, read it again skipping the hands already in the session
+            self.__init__(self.session, self.path, self.csv_format)
+        self._inode = stat.st_ino
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        self.offset += len(data)
+        lines = (self._partial_line + data).split(b"\n")
+        self._partial_line = lines.pop()  # not terminated yet, wait for the rest of it
+        lines = [line.rstrip(b"\r").decode("utf-8") for line in lines if line.strip(b"\r")]
+        if self.csv_format:
+            lines = [row[0] for row in csv.reader(lines)]
+            if not self._header_skipped and lines:
+                lines, self._header_skipped = lines[1:], True
+
+        new_hands = []
+        for line in lines:
+            entry = Entry(line)
+            if entry.descriptor == "start":
+                new_hands.extend(self.flush(ended=False))
+                self._current_hand = [entry]
+            elif entry.descriptor in ['add stack', 'join']:
+                self._admin_entries.append(entry)
+            elif entry.descriptor not in ['terminate', 'admin'] and self._current_hand is not None:
+                self._current_hand.append(entry)
+        return new_hands
+
+    def flush(self, ended=True) -> list[Hand]:
+        """
+        complete the hand held back, returns it in a list. With ended only if its "ending hand" line was read
+        """
+        entries, self._current_hand = self._current_hand, None
+        if entries is None or ended and not any(entry.descriptor == "end" for entry in entries):
+            self._current_hand = entries
+            return []
+        if entries[0].meta in self.session._id_to_hand:
+            # read again after a truncation, it was added with the admin entries up to the next hand
+            self._admin_entries = []
+            return []
+        hand = self._complete_hand(entries)
+        return [hand] if hand else []
+
+    def _complete_hand(self, entries: list[Entry]):
+        try:
+            hand = Hand(entries)
+        except KeyError:
+            self.session._add_hands([], self._admin_entries, [entries])
+            self._admin_entries = []
+            return None
+        self.session._add_hands([hand], self._admin_entries, [])
+        self._admin_entries = []
+        self.session.log_hand_stats(hand)
+        for name in set(self.session.name_map[name] for name in hand.players):
+            self.session.players[name].update_stats()
+        self.session.players["_average_"].update_stats()
+        return hand
+
+    def run(self, interval=5.0, callback: Callable[[list[Hand]], None] = None):
+        """
+        poll every interval seconds until interrupted, passing each batch of new hands to callback
+        """
+        try:
+            while True:
+                new_hands = self.poll()
+                if new_hands and callback:
+                    callback(new_hands)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
@@ -1,387 +1,459 @@
+import sys
+import numpy as np
+from array import array
 from .entry import Entry
-from copy import deepcopy
+from .bet_history import BetHistory
+from .table import TableEntry
 from tabulate import tabulate
 from .utils import pretty_cards, COLOR, get_rank, EntryList, raw_attributes
 
+# (attribute, description) of each preflop raise in order, and the call / fold lists once n raises were made
+_PREFLOP_RAISES = (("pfr", "PFR"), ("three_bet", "3-Bet"), ("four_bet", "4-Bet"), ("five_bet", "5-Bet"))
+_PREFLOP_CALLS = (None, "call_pfr", "call_three_bet", "call_four_bet", "call_four_bet")
+_PREFLOP_FOLDS = (None, "fold_to_pfr", "fold_to_three_bet", "fold_to_four_bet", "fold_to_four_bet")
+
+# postflop streets: the first bet is a barrel when it comes from the opener, gate has to be set for it to count
+_STREETS = {
+    "flop": dict(gate=None, opener="preflop_lead", donk_against="pfr", barrel="c_bet", label="C-Bet", lead="flop_lead",
+                 raise_against="raise_against_c", call="call_c", fold="fold_to_c"),
+    "turn": dict(gate="c_bet", opener="c_bet", donk_against="c_bet", barrel="double_barrel", label="2-Barrel", lead="turn_lead",
+                 raise_against="raise_against_double", call="call_double", fold="fold_to_double"),
+    "river": dict(gate="double_barrel", opener="double_barrel", donk_against="double_barrel", barrel="triple_barrel", label="3-Barrel",
+                  lead="river_lead", raise_against="raise_against_triple", call="call_triple", fold="fold_to_triple"),
+}
+
+# per-hand roles, stored as seat + 1 (0 when nobody took the role)
+_ROLES = ("three_bet", "four_bet", "five_bet", "c_bet", "double_barrel", "triple_barrel", "pfr",
+          "raise_against_c", "raise_against_double", "raise_against_triple",
+          "preflop_lead", "flop_lead", "turn_lead", "river_lead")
+# per-player counts, stored as one row of seats per stat. The first ones read as lists of names
+_NAME_COUNTS = ("vpip", "join_flop", "wtsd", "fold_to_three_bet", "fold_to_four_bet", "fold_to_pfr", "fold_to_c",
+                "fold_to_double", "fold_to_triple", "call_three_bet", "call_four_bet", "call_pfr", "call_c",
+                "call_double", "call_triple")
+_COUNTS = _NAME_COUNTS + ("check_raise", "call_without_checkraise", "attack", "defend")
+_COUNT_INDEX = {stat: i for i, stat in enumerate(_COUNTS)}
+
+# slots derived on demand, grouped by the method that computes them, the first one is always set by it
+_LAZY_GROUPS = {
+    "_read_streets": ("_runouts",),
+    "_read_showdown": ("winner", "pot", "_own_hand", "revealed_holdings"),
+    "_read_betting": ("bet_history", "_roles", "_counts", "_preflop_pot", "_flop_pot", "_turn_pot",
+                      "_stack_changes", "_uncalled"),
+}
+_LAZY_ATTRIBUTES = {attribute: method for method, attributes in _LAZY_GROUPS.items() for attribute in attributes}
+
+def _role_property(role: str) -> property:
+    return property(lambda self: self._role(role))
+
+def _names_property(stat: str) -> property:
+    return property(lambda self: self._names(stat))
+
 class Hand:
-    def __init__(self, entries: list[Entry]) -> None:
-        self.entries = EntryList(entries)
-        assert self.entries[0].descriptor == "start"
-        self.id = self.entries[0].meta
+    """
+    one hand of a log. With lazy=True only the index (id, dealer, players with their "name @ hash"
+    identities, blinds) is read up front, the streets, showdown and betting analysis are each computed
+    on first access to one of their attributes and kept. A lazy hand that cannot be parsed raises the
+    KeyError at that first access.
+
+    Entries of an EntryTable are kept as row numbers, roles as seats and per-player stats as counts per
+    seat, the attributes listed by raw_attributes() are properties that read them back as names.
+    """
+    __slots__ = ("_table", "_rows", "id", "own_player_id", "players", "identities", "num_players", "ante", "sb", "bb",
+                 "_runouts", "winner", "pot", "_own_hand", "revealed_holdings",
+                 "bet_history", "_roles", "_counts", "_preflop_pot", "_flop_pot", "_turn_pot", "_stack_changes", "_uncalled")
+
+    def __init__(self, entries: list[Entry], lazy=False) -> None:
+        entries = list(entries)
+        table = getattr(entries[0], "table", None)
+        if table is not None and all(isinstance(entry, TableEntry) and entry.table is table for entry in entries):
+            rows = [entry.row for entry in entries]
+            self._table = table
+            self._rows = range(rows[0], rows[-1] + 1) if rows[-1] - rows[0] == len(rows) - 1 else array("I", rows)
+        else:
+            self._table = None
+            self._rows = EntryList(entries)
+        assert self[0].descriptor == "start"
+        self.id = self[0].meta
         self.own_player_id = None
+
+        self._read_index()
+        if not lazy:
+            self.analyze()
+
+    def __getattr__(self, name):
+        method = _LAZY_ATTRIBUTES.get(name)
+        if method is None or self._has(_LAZY_GROUPS[method][0]):
+            raise AttributeError(f"'Hand' object has no attribute '{name}'")
         try:
-            self.dealer = self.entries[0].name[0]
+            getattr(self, method)()
+        except Exception:
+            for attribute in _LAZY_GROUPS[method]:
+                if self._has(attribute):
+                    delattr(self, attribute)
+            raise
+        return object.__getattribute__(self, name)
+
+    def _has(self, name) -> bool:
+        try:
+            object.__getattribute__(self, name)
+        except AttributeError:
+            return False
+        return True
+
+    def __getstate__(self):
+        # only what is computed so far, pickling must not compute the lazy groups
+        return {name: object.__getattribute__(self, name) for name in self.__slots__ if self._has(name)}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def analyze(self):
+        """
+        compute every group not computed yet, raises KeyError for a hand that cannot be parsed
+        """
+        for method, attributes in _LAZY_GROUPS.items():
+            getattr(self, attributes[0])
+
+    @property
+    def entries(self):
+        if self._table is None:
+            return self._rows
+        return EntryList([TableEntry(self._table, row) for row in self._rows])
+
+    @property
+    def dealer(self):
+        try:
+            return self[0].name[0]
         except IndexError:
-            self.dealer = None
+            return None
+
+    @property
+    def flop(self):
+        return [list(self._runouts[0]), list(self._runouts[1])]
+
+    @property
+    def turn(self):
+        return [list(self._runouts[2]), list(self._runouts[3])]
+
+    @property
+    def river(self):
+        return [list(self._runouts[4]), list(self._runouts[5])]
 
-        self._init_attributes()
+    @property
+    def rabbit(self):
+        return [list(self._runouts[6])]
+
+    @property
+    def board(self):
+        return self._get_board()
+
+    @property
+    def own_hand(self):
+        return None if self._own_hand is None else list(self._own_hand)
+
+    @property
+    def starting_stacks(self):
+        stacks = [entry.meta for entry in self.entries if entry.descriptor == "stack count"]
+        if not stacks:
+            raise AttributeError("'Hand' object has no attribute 'starting_stacks'")
+        return stacks[-1]
+
+    @property
+    def stack_changes(self):
+        return dict(zip(self.players, self._stack_changes))
+
+    @property
+    def player_aggression_factor(self):
+        return {player: {"attack": attack, "defend": defend} for player, attack, defend
+                in zip(self.players, self._count_row("attack"), self._count_row("defend"))}
+
+    @property
+    def check_raise(self):
+        return dict(zip(self.players, self._count_row("check_raise")))
+
+    @property
+    def call_without_checkraise(self):
+        return dict(zip(self.players, self._count_row("call_without_checkraise")))
+
+    # the player who took each of _ROLES, None when nobody did
+    three_bet = _role_property("three_bet")
+    four_bet = _role_property("four_bet")
+    five_bet = _role_property("five_bet")
+    c_bet = _role_property("c_bet")
+    double_barrel = _role_property("double_barrel")
+    triple_barrel = _role_property("triple_barrel")
+    pfr = _role_property("pfr")
+    raise_against_c = _role_property("raise_against_c")
+    raise_against_double = _role_property("raise_against_double")
+    raise_against_triple = _role_property("raise_against_triple")
+    preflop_lead = _role_property("preflop_lead")
+    flop_lead = _role_property("flop_lead")
+    turn_lead = _role_property("turn_lead")
+    river_lead = _role_property("river_lead")
+    # the names of _NAME_COUNTS, a player once per count
+    vpip = _names_property("vpip")
+    join_flop = _names_property("join_flop")
+    wtsd = _names_property("wtsd")
+    fold_to_three_bet = _names_property("fold_to_three_bet")
+    fold_to_four_bet = _names_property("fold_to_four_bet")
+    fold_to_pfr = _names_property("fold_to_pfr")
+    fold_to_c = _names_property("fold_to_c")
+    fold_to_double = _names_property("fold_to_double")
+    fold_to_triple = _names_property("fold_to_triple")
+    call_three_bet = _names_property("call_three_bet")
+    call_four_bet = _names_property("call_four_bet")
+    call_pfr = _names_property("call_pfr")
+    call_c = _names_property("call_c")
+    call_double = _names_property("call_double")
+    call_triple = _names_property("call_triple")
+
+    def _count_row(self, stat: str):
+        n = len(self.players)
+        start = _COUNT_INDEX[stat] * n
+        return self._counts[start:start + n]
+
+    def _role(self, role: str):
+        seat = self._roles[_ROLES.index(role)]
+        return self.players[seat - 1] if seat else None
+
+    def _names(self, stat: str) -> list[str]:
+        return [name for name, count in zip(self.players, self._count_row(stat)) for _ in range(count)]
+
+    def _read_index(self):
+        self.ante = 0
+        self.sb = 0
+        self.bb = 0
+        self.num_players = 0
+        self.players = []
+        self.identities = []
         for entry in self.entries:
             if entry.descriptor in ["SB", "BB", "fold", "call", "bet", "raise", "check"]:
                 if entry.name[0][0] not in self.players:
                     self.players.append(entry.name[0][0])
+                    self.identities.append(sys.intern(" @ ".join(entry.name[0])))
                     self.num_players += 1
-        self.bet_history = {0: dict(stage="preflop", bet={name: 0 for name in self.players})}
+            if entry.descriptor in ["ANTE", "SB", "BB"]:
+                setattr(self, entry.descriptor.lower(), entry.meta)
 
+    def _read_streets(self):
+        flop, turn, river, rabbit = [[], []], [[], []], [[], []], [[]]
+        streets = {"flop": flop, "turn": turn, "river": river}
         _stage = "preflop"
-        bet_history_index = 1
-        stage_change = False
-        for i, entry in enumerate(self.entries):
-            if entry.descriptor == "stack count":
-                self.starting_stacks = entry.meta
-            
-            elif entry.descriptor == "uncalled":
-                self._uncalled = {"name": entry.name[0][0], "amount": entry.meta}
-            
-            elif entry.descriptor in ["flop", "turn", "river"]:
+        for entry in self.entries:
+            if entry.descriptor in streets:
                 _stage = entry.descriptor
-                if getattr(self, entry.descriptor)[0]:
-                    getattr(self, entry.descriptor)[1] += entry.meta
+                if streets[entry.descriptor][0]:
+                    streets[entry.descriptor][1] += entry.meta
                 else:
-                    getattr(self, entry.descriptor)[0] += entry.meta
-                stage_change = True
-            self[i].stage = _stage
+                    streets[entry.descriptor][0] += entry.meta
+            elif entry.descriptor == "rabbit":
+                rabbit[0] = entry.meta
+            entry.stage = _stage
+        self._runouts = tuple(bytes(cards) for cards in flop + turn + river + rabbit)
 
-            if entry.descriptor == "rabbit":
-                getattr(self, entry.descriptor)[0] = entry.meta
-            elif entry.descriptor == "collect":
+    def _read_showdown(self):
+        self.pot = 0
+        self._own_hand = None
+        self.revealed_holdings = dict()
+        winner = dict()
+        for entry in self.entries:
+            if entry.descriptor == "collect":
                 self.pot += entry.meta
                 try:
-                    self.winner[entry.name[0][0]] += entry.meta
+                    winner[entry.name[0][0]] += entry.meta
                 except KeyError:
-                    self.winner[entry.name[0][0]] = entry.meta
+                    winner[entry.name[0][0]] = entry.meta
             elif entry.descriptor == "own hand":
-                self.own_hand = entry.meta
+                self._own_hand = bytes(entry.meta)
             elif entry.descriptor == "show":
                 self.revealed_holdings[entry.name[0][0]] = entry.meta
+        self.winner = winner
 
-            elif entry.descriptor in ["ANTE", "SB", "BB"]:
-                setattr(self, entry.descriptor.lower(), entry.meta)
-                if entry.descriptor in ["SB", "BB"]:
-                    self.bet_history[0]["bet"][entry.name[0][0]] = getattr(self, entry.descriptor.lower()) + self.ante
-                else:
-                    self.bet_history[0]["bet"][entry.name[0][0]] = self.ante
-                self.bet_history[0]["fold"] = []
+    def _read_betting(self):
+        bet_history = BetHistory(self.players)
+        vpip = []
+        _stage = "preflop"
+        stage_change = False
+        ante = 0
+        for entry in self.entries:
+            if entry.descriptor == "uncalled":
+                self._uncalled = (entry.name[0][0], entry.meta)
+            elif entry.descriptor in ["flop", "turn", "river"]:
+                _stage = entry.descriptor
+                stage_change = True
+
+            elif entry.descriptor == "ANTE":
+                ante = entry.meta
+                bet_history.post(entry.name[0][0], ante)
+            elif entry.descriptor in ["SB", "BB"]:
+                bet_history.post(entry.name[0][0], entry.meta + ante)
             elif entry.descriptor in ["call", "bet", "raise"]:
                 if _stage == "preflop":
-                    self.vpip.append(entry.name[0][0])
-                self.bet_history[bet_history_index] = deepcopy(self.bet_history[bet_history_index - 1])
-                self.bet_history[bet_history_index]["fold"] = []
-                self.bet_history[bet_history_index]["stage"] = _stage
-                if _stage == "preflop":
-                    self.bet_history[bet_history_index]["bet"][entry.name[0][0]] = entry.meta + self.ante
+                    vpip.append(entry.name[0][0])
+                    bet_history.append(_stage, entry.name[0][0], entry.meta + ante)
                 else:
-                    if stage_change:
-                        for key in self.bet_history[bet_history_index]["bet"]:
-                            self.bet_history[bet_history_index]["bet"][key] = 0
-                        stage_change = False
-                    self.bet_history[bet_history_index]["bet"][entry.name[0][0]] = entry.meta
-                bet_history_index += 1
+                    bet_history.append(_stage, entry.name[0][0], entry.meta, reset=stage_change)
+                    stage_change = False
             elif entry.descriptor == "fold":
-                self.bet_history[bet_history_index - 1]["fold"].append(entry.name[0][0])
-        self.bet_history[max(self.bet_history) + 1] = dict(stage="end")
-
-        self.player_aggression_factor = {player:{"attack": 0, "defend": 0} for player in self.players}
-        self.check_raise = {player:0 for player in self.players}
-        self.call_without_checkraise = {player:0 for player in self.players}
-        self._parse_bet_history()
-        self._get_pot_at_stage()
-        self.board = self._get_board()
-        self.stack_changes = self._calculate_stack_change()
-        self.vpip = list(set(self.vpip))
+                bet_history.fold(entry.name[0][0])
+        bet_history.end()
+
+        street_bets = self._parse_bet_history(bet_history, vpip)
+        self._stack_changes = array("q", self._calculate_stack_change(street_bets).values())
+        self.bet_history = bet_history
     
     def _get_board(self):
-        first = self.flop[0] + self.turn[0] + self.river[0]
-        if self.river[1] and self.turn[1] and self.flop[1]:
-            second = self.flop[1] + self.turn[1] + self.river[1]
-        elif self.river[1] and self.turn[1]:
-            second = self.flop[0] + self.turn[1] + self.river[1]
-        elif self.river[1]:
-            second = self.flop[0] + self.turn[0] + self.river[1]
+        flop, turn, river = self.flop, self.turn, self.river
+        first = flop[0] + turn[0] + river[0]
+        if river[1] and turn[1] and flop[1]:
+            second = flop[1] + turn[1] + river[1]
+        elif river[1] and turn[1]:
+            second = flop[0] + turn[1] + river[1]
+        elif river[1]:
+            second = flop[0] + turn[0] + river[1]
         else:
             second = []
 
         return [first, second]
 
-    def _init_attributes(self):
-        self.pot = 0
-        self.ante = 0
-        self.sb = 0
-        self.bb = 0
-        self.num_players = 0
-        self.own_hand = None
-        self.flop = [[], []]
-        self.turn = [[], []]
-        self.river = [[], []]
-        self.rabbit = [[]]
-        self.three_bet = None
-        self.four_bet = None
-        self.five_bet = None
-        self.c_bet = None
-        self.double_barrel = None
-        self.triple_barrel = None
-        self.pfr = None
-        self.raise_against_c = None
-        self.raise_against_double = None
-        self.raise_against_triple = None
-        self.revealed_holdings = dict()
-        self.players = []
-        self.winner = dict()
-        self.vpip = []
-        self.join_flop = []
-        self.wtsd = []
-        self.fold_to_three_bet = []
-        self.fold_to_four_bet = []
-        self.fold_to_pfr = []
-        self.fold_to_c = []
-        self.fold_to_double = []
-        self.fold_to_triple = []
-        self.call_three_bet = []
-        self.call_four_bet = []
-        self.call_pfr = []
-        self.call_c = []
-        self.call_double = []
-        self.call_triple = []
-
-    def _get_pot_at_stage(self):
-        preflop_last_layer = None
-        flop_last_layer = None
-        turn_last_layer = None 
-        for i, history in self.bet_history.items():
-            if history["stage"] == "flop" and not preflop_last_layer:
+    def _get_pot_at_stage(self, pots, preflop_last_layer, flop_last_layer, turn_last_layer):
+        self._preflop_pot = pots[preflop_last_layer] if preflop_last_layer else pots[-2]
+        self._flop_pot = pots[flop_last_layer] + self._preflop_pot if flop_last_layer and flop_last_layer != preflop_last_layer else self._preflop_pot
+        self._turn_pot = pots[turn_last_layer] + self._flop_pot if turn_last_layer and turn_last_layer != flop_last_layer else self._flop_pot
+
+    def _parse_bet_history(self, bet_history: BetHistory, vpip: list[str]):
+        """
+        one walk over the bet history: street leads, raise ladders, barrels, check-raises, pots and stack changes
+        """
+        seat = {name: i for i, name in enumerate(self.players)}
+        n = len(self.players)
+        roles = dict.fromkeys(_ROLES)
+        counts = array("B", bytes(len(_COUNTS) * n))
+
+        def tally(stat, names):
+            for name in names:
+                counts[_COUNT_INDEX[stat] * n + seat[name]] += 1
+
+        tally("vpip", set(vpip))
+        bet_to_reach = {"preflop": self.bb + self.ante, "flop": 0, "turn": 0, "river": 0}
+        raises = 0
+        street_start = set()
+        street_bets = dict()
+        preflop_end_layer, preflop_end_bet = None, None
+        river_end_layer, river_end_bet = None, None
+        preflop_last_layer, flop_last_layer, turn_last_layer = None, None, None
+        pots = []
+
+        bet_history.describe(0, None, "start")
+        previous, previous_stage = None, None
+        for i, stage, folded, bet in bet_history.walk():
+            if stage != previous_stage and previous_stage is not None:
+                street_bets[previous_stage] = previous
+            if stage != "preflop" and not preflop_end_layer \
+                        and sum(1 for amount in previous.values() if amount == bet_to_reach["preflop"]) > 1:
+                preflop_end_layer, preflop_end_bet = i - 1, previous
+            if not river_end_layer and stage == "end" and previous_stage == "river" \
+                        and sum(1 for amount in previous.values() if amount == bet_to_reach["river"]) > 1:
+                river_end_layer, river_end_bet = i - 1, previous
+
+            if stage == "flop" and not preflop_last_layer:
                 preflop_last_layer = i - 1
-            elif history["stage"] == "turn" and not flop_last_layer:
+            elif stage == "turn" and not flop_last_layer:
                 if not preflop_last_layer:
                     preflop_last_layer = i - 1
                 flop_last_layer = i - 1
-            elif history["stage"] in ["river", "end"] and not turn_last_layer:
+            elif stage in ["river", "end"] and not turn_last_layer:
                 if not flop_last_layer:
                     flop_last_layer = i - 1
                 if not preflop_last_layer:
                     preflop_last_layer = i - 1
                 turn_last_layer = i - 1
-        self._preflop_pot = sum(self.bet_history[preflop_last_layer]["bet"].values()) if preflop_last_layer \
-            else sum(self.bet_history[max(self.bet_history) - 1]["bet"].values())
-        self._flop_pot = sum(self.bet_history[flop_last_layer]["bet"].values()) + self._preflop_pot if flop_last_layer and flop_last_layer != preflop_last_layer else self._preflop_pot
-        self._turn_pot = sum(self.bet_history[turn_last_layer]["bet"].values()) + self._flop_pot if turn_last_layer and turn_last_layer != flop_last_layer else self._flop_pot
-        
-    def _parse_bet_history(self):
-        preflop_bet_to_reach = self.bb + self.ante
-        flop_bet_to_reach = 0
-        turn_bet_to_reach = 0
-        river_bet_to_reach = 0
-        self.preflop_lead = None
-        self.flop_lead = None
-        self.turn_lead = None
-        self.river_lead = None
-        folds = []
+            pots.append(sum(bet.values()) if stage != "end" else 0)
 
-        _preflop_end_layer = None
-        _river_end_layer = None
-        
-        self._describe_bet_stage(0, None, "start")
-        flop_start, turn_start, river_start = False, False, False
-        for i, stage in self.bet_history.items():
-            if stage["stage"] != "preflop" and not _preflop_end_layer \
-                        and len([name for name, bet in self.bet_history[i - 1]["bet"].items() if bet == preflop_bet_to_reach]) > 1:
-                _preflop_end_layer = i - 1
-            if not _river_end_layer and stage["stage"] == "end" and self.bet_history[i - 1]["stage"] == "river" \
-                        and len([name for name, bet in self.bet_history[i - 1]["bet"].items() if bet == river_bet_to_reach]) > 1:
-                _river_end_layer = i - 1
-
-            if i == 0 or i == max(self.bet_history):
+            if i == 0 or stage == "end":
+                previous, previous_stage = dict(bet), stage
                 continue
-            folds.extend(stage["fold"])
-            stage_lead = max(stage["bet"], key=lambda k: stage["bet"][k])
-            # analyze PFR, 3Bet, 4Bet, Fold to PFR, Fold to 3Bet, Fold to 4Bet on preflop
-            if stage["stage"] == "preflop":
-                if stage["bet"][stage_lead] > preflop_bet_to_reach:
-                    if self.five_bet:
-                        self._describe_bet_stage(i, stage_lead, "5-Bet+")
-                    elif self.four_bet:
-                        self.five_bet = stage_lead
-                        self._describe_bet_stage(i, stage_lead, "5-Bet")
-                    elif self.three_bet:
-                        self.four_bet = stage_lead
-                        self._describe_bet_stage(i, stage_lead, "4-Bet")
-                    elif self.pfr:
-                        self.three_bet = stage_lead
-                        self._describe_bet_stage(i, stage_lead, "3-Bet")
-                    else:
-                        self.pfr = stage_lead
-                        self._describe_bet_stage(i, stage_lead, "PFR")
-
-                    self.preflop_lead = stage_lead
-                    preflop_bet_to_reach = stage["bet"][stage_lead]
-                else:
-                    caller = self._identify_change(self.bet_history[i]["bet"], self.bet_history[i - 1]["bet"])
-                    if self.four_bet:
-                        self.call_four_bet.append(caller)
-                    elif self.three_bet:
-                        self.call_three_bet.append(caller)
-                    elif self.pfr:
-                        self.call_pfr.append(caller)
-                    self._describe_bet_stage(i, caller, "Call")
-                
-                if stage["fold"]:
-                    if self.four_bet:
-                        self.fold_to_four_bet.extend(stage["fold"])
-                    elif self.three_bet:
-                        self.fold_to_three_bet.extend(stage["fold"])
-                    elif self.pfr:
-                        self.fold_to_pfr.extend(stage["fold"])
-            # analyze C-bet, fold to C-bet on flop
-            elif stage["stage"] == "flop":
-                if stage["bet"][stage_lead] > flop_bet_to_reach:
-                    self.player_aggression_factor[stage_lead]["attack"] += 1
-                    if not flop_start:
-                        if stage_lead == self.preflop_lead:
-                            self.c_bet = stage_lead
-                            self._describe_bet_stage(i, stage_lead, "C-Bet")
-                        elif self.pfr and [player for player in self.players].index(stage_lead) < [player for player in self.players].index(self.pfr):
-                            self._describe_bet_stage(i, stage_lead, "Donk")
-                        else:
-                            self._describe_bet_stage(i, stage_lead, "Bet")
-                    elif self.flop_lead and [player for player in self.players].index(stage_lead) < [player for player in self.players].index(self.flop_lead) \
-                                                        and self.bet_history[i - 1]["bet"][stage_lead] == 0:
-                        if not self.raise_against_c and self.c_bet:
-                            self.raise_against_c = stage_lead
-                        self.check_raise[stage_lead] += 1
-                        self._describe_bet_stage(i, stage_lead, "Check-Raise")
-                    elif self.flop_lead:
-                        if not self.raise_against_c and self.c_bet:
-                            self.raise_against_c = stage_lead
-                        self._describe_bet_stage(i, stage_lead, "Raise")
-                    else:
-                        self._describe_bet_stage(i, stage_lead, "Bet")
-                    self.flop_lead = stage_lead
-                    flop_bet_to_reach = stage["bet"][stage_lead]
-                else:
-                    caller = self._identify_change(self.bet_history[i]["bet"], self.bet_history[i - 1]["bet"])
-                    self.player_aggression_factor[caller]["defend"] += 1
-                    if self.flop_lead and [player for player in self.players].index(caller) < [player for player in self.players].index(self.flop_lead) \
-                                                        and self.bet_history[i - 1]["bet"][caller] == 0:
-                         self.call_without_checkraise[caller] += 1
-                    if self.c_bet:
-                        self.call_c.append(caller)
-                    self._describe_bet_stage(i, caller, "Call")
-                flop_start = True
-
-                if stage["fold"] and self.c_bet:
-                    self.fold_to_c.extend(stage["fold"])
-
-            # analyze double-barrel, fold to double barrel on turn
-            elif stage["stage"] == "turn":
-                if stage["bet"][stage_lead] > turn_bet_to_reach:
-                    self.player_aggression_factor[stage_lead]["attack"] += 1
-                    if not turn_start and self.c_bet:
-                        if stage_lead == self.c_bet:
-                            self.double_barrel = stage_lead
-                            self._describe_bet_stage(i, stage_lead, "2-Barrel")
-                        elif self.c_bet and [player for player in self.players].index(stage_lead) < [player for player in self.players].index(self.c_bet):
-                            self._describe_bet_stage(i, stage_lead, "Donk")
-                        else:
-                            self._describe_bet_stage(i, stage_lead, "Bet")
-                    elif self.turn_lead and [player for player in self.players].index(stage_lead) < [player for player in self.players].index(self.turn_lead) \
-                                         and self.bet_history[i - 1]["bet"][stage_lead] == 0:
-                        if not self.raise_against_double and self.double_barrel:
-                            self.raise_against_double = stage_lead
-                        self.check_raise[stage_lead] += 1
-                        self._describe_bet_stage(i, stage_lead, "Check-Raise")
-                    elif self.turn_lead:
-                        if not self.raise_against_double and self.double_barrel:
-                            self.raise_against_double = stage_lead
-                        self._describe_bet_stage(i, stage_lead, "Raise")
+            stage_lead = max(bet, key=bet.get)
+            if stage == "preflop":
+                if bet[stage_lead] > bet_to_reach[stage]:
+                    if raises < len(_PREFLOP_RAISES):
+                        roles[_PREFLOP_RAISES[raises][0]] = stage_lead
+                        bet_history.describe(i, stage_lead, _PREFLOP_RAISES[raises][1])
+                        raises += 1
                     else:
-                        self._describe_bet_stage(i, stage_lead, "Bet")
-                    self.turn_lead = stage_lead
-                    turn_bet_to_reach = stage["bet"][stage_lead]
+                        bet_history.describe(i, stage_lead, "5-Bet+")
+                    roles["preflop_lead"] = stage_lead
+                    bet_to_reach[stage] = bet[stage_lead]
                 else:
-                    caller = self._identify_change(self.bet_history[i]["bet"], self.bet_history[i - 1]["bet"])
-                    self.player_aggression_factor[caller]["defend"] += 1
-                    if self.turn_lead and [player for player in self.players].index(caller) < [player for player in self.players].index(self.turn_lead) \
-                                                        and self.bet_history[i - 1]["bet"][caller] == 0:
-                         self.call_without_checkraise[caller] += 1
-                    if self.double_barrel:
-                        self.call_double.append(caller)
-                    self._describe_bet_stage(i, caller, "Call")
-                turn_start = True
-
-                if stage["fold"] and self.double_barrel:
-                    self.fold_to_double.extend(stage["fold"])
-
-            # analyze triple-barrel, fold to triple-barrel
-            elif stage["stage"] == "river":
-                if stage["bet"][stage_lead] > river_bet_to_reach:
-                    self.player_aggression_factor[stage_lead]["attack"] += 1
-                    if not river_start and self.double_barrel:
-                        if stage_lead == self.double_barrel:
-                            self.triple_barrel = stage_lead
-                            self._describe_bet_stage(i, stage_lead, "3-Barrel")
-                        elif self.double_barrel and [player for player in self.players].index(stage_lead) < [player for player in self.players].index(self.double_barrel):
-                            self._describe_bet_stage(i, stage_lead, "Donk")
+                    caller = self._identify_change(bet, previous)
+                    if raises:
+                        tally(_PREFLOP_CALLS[raises], [caller])
+                    bet_history.describe(i, caller, "Call")
+
+                if folded and raises:
+                    tally(_PREFLOP_FOLDS[raises], folded)
+            else:
+                street = _STREETS[stage]
+                street_lead = roles[street["lead"]]
+                barrel = roles[street["barrel"]]
+                if bet[stage_lead] > bet_to_reach[stage]:
+                    tally("attack", [stage_lead])
+                    if stage not in street_start and (street["gate"] is None or roles[street["gate"]]):
+                        opener = roles[street["opener"]]
+                        donk_against = roles[street["donk_against"]]
+                        if stage_lead == opener:
+                            roles[street["barrel"]] = stage_lead
+                            bet_history.describe(i, stage_lead, street["label"])
+                        elif donk_against and seat[stage_lead] < seat[donk_against]:
+                            bet_history.describe(i, stage_lead, "Donk")
                         else:
-                            self._describe_bet_stage(i, stage_lead, "Bet")
-                    elif self.river_lead and [player for player in self.players].index(stage_lead) < [player for player in self.players].index(self.river_lead) and self.bet_history[i - 1]["bet"][stage_lead] == 0:
-                        if not self.raise_against_triple and self.triple_barrel:
-                            self.raise_against_triple = stage_lead
-                        self.check_raise[stage_lead] += 1
-                        self._describe_bet_stage(i, stage_lead, "Check-Raise")
-                    elif self.river_lead:
-                        if not self.raise_against_triple and self.triple_barrel:
-                            self.raise_against_triple = stage_lead
-                        self._describe_bet_stage(i, stage_lead, "Raise")
+                            bet_history.describe(i, stage_lead, "Bet")
+                    elif street_lead and seat[stage_lead] < seat[street_lead] and previous[stage_lead] == 0:
+                        if not roles[street["raise_against"]] and barrel:
+                            roles[street["raise_against"]] = stage_lead
+                        tally("check_raise", [stage_lead])
+                        bet_history.describe(i, stage_lead, "Check-Raise")
+                    elif street_lead:
+                        if not roles[street["raise_against"]] and barrel:
+                            roles[street["raise_against"]] = stage_lead
+                        bet_history.describe(i, stage_lead, "Raise")
                     else:
-                        self._describe_bet_stage(i, stage_lead, "Bet")
-                    self.river_lead = stage_lead
-                    river_bet_to_reach = stage["bet"][stage_lead]
+                        bet_history.describe(i, stage_lead, "Bet")
+                    roles[street["lead"]] = stage_lead
+                    bet_to_reach[stage] = bet[stage_lead]
                 else:
-                    caller = self._identify_change(self.bet_history[i]["bet"], self.bet_history[i - 1]["bet"])
-                    self.player_aggression_factor[caller]["defend"] += 1
-                    if self.river_lead and [player for player in self.players].index(caller) < [player for player in self.players].index(self.river_lead) \
-                                                        and self.bet_history[i - 1]["bet"][caller] == 0:
-                         self.call_without_checkraise[caller] += 1
-                    if self.triple_barrel:
-                        self.call_triple.append(caller)
-                    self._describe_bet_stage(i, caller, "Call")
-                river_start = True
-
-                if stage["fold"] and self.triple_barrel:
-                    self.fold_to_triple.extend(stage["fold"])
-
-        if _preflop_end_layer:
-            self.join_flop.extend([name for name, bet in self.bet_history[_preflop_end_layer]["bet"].items() if bet == preflop_bet_to_reach])
-        if _river_end_layer:
-            self.wtsd.extend([name for name, bet in self.bet_history[_river_end_layer]["bet"].items() if bet == river_bet_to_reach])
-
-    def _calculate_stack_change(self):
+                    caller = self._identify_change(bet, previous)
+                    tally("defend", [caller])
+                    if street_lead and seat[caller] < seat[street_lead] and previous[caller] == 0:
+                        tally("call_without_checkraise", [caller])
+                    if barrel:
+                        tally(street["call"], [caller])
+                    bet_history.describe(i, caller, "Call")
+                street_start.add(stage)
+
+                if folded and roles[street["barrel"]]:
+                    tally(street["fold"], folded)
+            previous, previous_stage = dict(bet), stage
+
+        if preflop_end_layer:
+            tally("join_flop", [name for name, amount in preflop_end_bet.items() if amount == bet_to_reach["preflop"]])
+        if river_end_layer:
+            tally("wtsd", [name for name, amount in river_end_bet.items() if amount == bet_to_reach["river"]])
+        self._get_pot_at_stage(pots, preflop_last_layer, flop_last_layer, turn_last_layer)
+        self._roles = bytes(0 if roles[role] is None else seat[roles[role]] + 1 for role in _ROLES)
+        self._counts = counts
+        return street_bets
+
+    def _calculate_stack_change(self, street_bets):
         changes = {name: 0 for name in self.players}
-        preflop_bet = None
-        flop_bet = None
-        turn_bet = None
-        river_bet = None
-        for i, step in list(self.bet_history.items())[::-1]:
-            if step["stage"] == "preflop" and not preflop_bet:
-                preflop_bet = step["bet"]
-            elif step["stage"] == "flop" and not flop_bet:
-                flop_bet = step["bet"]
-            elif step["stage"] == "turn" and not turn_bet:
-                turn_bet = step["bet"]
-            elif step["stage"] == "river" and not river_bet:
-                river_bet = step["bet"]
-        if preflop_bet and sum(1 for num in preflop_bet.values() if num > 0) >= 2:
-            for name in preflop_bet:
-                changes[name] -= preflop_bet[name]
-        if flop_bet and sum(1 for num in flop_bet.values() if num > 0) >= 2:
-            for name in flop_bet:
-                changes[name] -= flop_bet[name]
-        if turn_bet and sum(1 for num in turn_bet.values() if num > 0) >= 2:
-            for name in turn_bet:
-                changes[name] -= turn_bet[name]
-        if river_bet and sum(1 for num in river_bet.values() if num > 0) >= 2:
-            for name in river_bet:
-                changes[name] -= river_bet[name]
-        
-        loser_changes = deepcopy(changes)
+        for stage in ["preflop", "flop", "turn", "river"]:
+            bet = street_bets.get(stage)
+            if bet and sum(1 for num in bet.values() if num > 0) >= 2:
+                for name in bet:
+                    changes[name] -= bet[name]
+
+        loser_changes = dict(changes)
         for winner in self.winner:
             loser_changes.pop(winner)
         
@@ -389,9 +461,6 @@ class Hand:
             changes[winner] = int(round(-sum(list(loser_changes.values())) / len(self.winner)))
         
         return changes
-
-    def _describe_bet_stage(self, i, name, descriptor):
-        self.bet_history[i]["descriptor"] = {"name": name, "action": descriptor}
     
     @staticmethod
     def _identify_change(stage1, stage2):
@@ -408,10 +477,10 @@ class Hand:
         out_content.append(tabulate([["Hand", self.id], ["SB:BB:ANTE", f"{self.sb}:{self.bb}:{self.ante}"], ["Holdings", pretty_cards(*self.own_hand) if self.own_hand else "Not recorded"]], tablefmt="grid"))
         cards = [[None, None, None], [None, None, None]]
         folds = []
+        layers = list(self.bet_history.values())
 
-        preflop_table = [[detail for detail in history["descriptor"].values()] for history in self.bet_history.values() if history["stage"] == "preflop"]
-        for stage, history in zip(preflop_table, [history for history in self.bet_history.values() if history["stage"] == "preflop"]):
-            history = deepcopy(history)
+        preflop_table = [[detail for detail in history["descriptor"].values()] for history in layers if history["stage"] == "preflop"]
+        for stage, history in zip(preflop_table, [history for history in layers if history["stage"] == "preflop"]):
             folds_this_round = [name for name in history["fold"]]
             for name in folds_this_round:
                 history["bet"][name] = COLOR.fold + str(history['bet'][name]) + COLOR.reset
@@ -426,9 +495,8 @@ class Hand:
             stage.extend([history["bet"][name] for name in self.players])
         out_content.append(tabulate(preflop_table, headers=headers, tablefmt='orgtbl'))
 
-        flop_table = [[detail for detail in history["descriptor"].values()] for history in self.bet_history.values() if history["stage"] == "flop"]
-        for stage, history in zip(flop_table, [history for history in self.bet_history.values() if history["stage"] == "flop"]):
-            history = deepcopy(history)
+        flop_table = [[detail for detail in history["descriptor"].values()] for history in layers if history["stage"] == "flop"]
+        for stage, history in zip(flop_table, [history for history in layers if history["stage"] == "flop"]):
             folds_this_round = [name for name in history["fold"]]
             for name in folds_this_round:
                 history["bet"][name] = COLOR.fold + str(history['bet'][name]) + COLOR.reset
@@ -458,9 +526,8 @@ class Hand:
                 stats[[player for player in self.players].index(name)] = COLOR.dormant + "0" + COLOR.reset
             out_content.append(tabulate([check_around + stats], headers=headers, tablefmt='orgtbl'))
 
-        turn_table = [[detail for detail in history["descriptor"].values()] for history in self.bet_history.values() if history["stage"] == "turn"]
-        for stage, history in zip(turn_table, [history for history in self.bet_history.values() if history["stage"] == "turn"]):
-            history = deepcopy(history)
+        turn_table = [[detail for detail in history["descriptor"].values()] for history in layers if history["stage"] == "turn"]
+        for stage, history in zip(turn_table, [history for history in layers if history["stage"] == "turn"]):
             folds_this_round = [name for name in history["fold"]]
             for name in folds_this_round:
                 history["bet"][name] = COLOR.fold + str(history['bet'][name]) + COLOR.reset
@@ -490,9 +557,8 @@ class Hand:
                 stats[[player for player in self.players].index(name)] = COLOR.dormant + "0" + COLOR.reset
             out_content.append(tabulate([check_around + stats], headers=headers, tablefmt='orgtbl'))
 
-        river_table = [[detail for detail in history["descriptor"].values()] for history in self.bet_history.values() if history["stage"] == "river"]
-        for stage, history in zip(river_table, [history for history in self.bet_history.values() if history["stage"] == "river"]):
-            history = deepcopy(history)
+        river_table = [[detail for detail in history["descriptor"].values()] for history in layers if history["stage"] == "river"]
+        for stage, history in zip(river_table, [history for history in layers if history["stage"] == "river"]):
             folds_this_round = [name for name in history["fold"]]
             for name in folds_this_round:
                 history["bet"][name] = COLOR.fold + str(history['bet'][name]) + COLOR.reset
@@ -557,7 +623,11 @@ class Hand:
         return "\n".join(out_content)
 
     def __getitem__(self, index):
-        return self.entries[index]
+        if self._table is None:
+            return self._rows[index]
+        if isinstance(index, slice):
+            return [TableEntry(self._table, row) for row in self._rows[index]]
+        return TableEntry(self._table, self._rows[index])
 
     def __str__(self, pretty=True):
         return self._pretty_history if pretty else [entry.raw for entry in self]
@@ -566,3 +636,35 @@ class Hand:
         lst = [getattr(self, attribute) for attribute in raw_attributes()]
         for i, attribute in enumerate(raw_attributes()):
             print(f"{attribute}: {lst[i]}")
+
+
+# columns of stat_matrix: the raw stats of a player, then the counters that are not raw attributes
+STAT_COLUMNS = tuple(raw_attributes()) + ("attack", "defend", "n_hands_tracked")
+
+def stat_matrix(hands: list[Hand]):
+    """
+    the stat counts of every seat of every hand as one int array, a row per (hand, seat) and a column
+    per STAT_COLUMNS, with the player name of each row. Summing rows gives the raw stats of a player
+    """
+    names = [name for hand in hands for name in hand.players]
+    matrix = np.zeros((len(names), len(STAT_COLUMNS)), dtype=np.int64)
+    if not names:
+        return matrix, names
+    n_seats = np.fromiter((len(hand.players) for hand in hands), dtype=np.int64, count=len(hands))
+    row_start = np.concatenate(([0], np.cumsum(n_seats)[:-1]))
+    hand_of_row = np.repeat(np.arange(len(hands)), n_seats)
+    seat_of_row = np.arange(len(names)) - row_start[hand_of_row]
+
+    # the counts of a hand are laid out stat by stat, a row of seats each
+    counts = np.frombuffer(b"".join(hand._counts.tobytes() for hand in hands), dtype=np.uint8)
+    columns = [i for i, stat in enumerate(STAT_COLUMNS) if stat in _COUNT_INDEX]
+    stats = np.array([_COUNT_INDEX[STAT_COLUMNS[i]] for i in columns])
+    index = (len(_COUNTS) * row_start[hand_of_row])[:, None] + stats[None, :] * n_seats[hand_of_row][:, None] + seat_of_row[:, None]
+    matrix[:, columns] = counts[index]
+
+    roles = np.frombuffer(b"".join(hand._roles for hand in hands), dtype=np.uint8).reshape(len(hands), len(_ROLES))
+    for i, role in enumerate(_ROLES):
+        taken = roles[:, i] > 0
+        matrix[row_start[taken] + roles[taken, i] - 1, STAT_COLUMNS.index(role)] += 1
+    matrix[:, STAT_COLUMNS.index("n_hands_tracked")] = 1
+    return matrix, names
@@ -0,0 +1,85 @@
+import heapq
+import time
+import pandas as pd
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+
+
+class Instrumentation:
+    """
+    wall time, calls and items per stage of the ingest pipeline (csv reading, Entry classification,
+    segmentation, every Hand step, logging the stats), with the n_slowest hands to build
+
+    stages are recorded in batches (a log, a chunk, a call of log_session_stats), callback(stage, seconds,
+    items) is called with every batch as it is recorded. Instrumentations filled in worker processes
+    merge into the one of the Session.
+    """
+    def __init__(self, callback: Callable[[str, float, int], None] = None, n_slowest=10) -> None:
+        self.callback = callback
+        self.n_slowest = n_slowest
+        self.seconds = dict()
+        self.calls = dict()
+        self.items = dict()
+        self._slowest = []  # min-heap of (seconds, hand id)
+
+    def record(self, stage: str, seconds: float, items=1, calls=1):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        self.calls[stage] = self.calls.get(stage, 0) + calls
+        self.items[stage] = self.items.get(stage, 0) + items
+        if self.callback:
+            self.callback(stage, seconds, items)
+
+    @contextmanager
+    def stage(self, stage: str, items=1):
+        start = time.perf_counter()
+        yield
+        self.record(stage, time.perf_counter() - start, items)
+
+    def timed(self, iterable: Iterable, stage: str) -> Iterator:
+        """
+        yield from iterable, recording the time spent producing the items as stage once it is exhausted
+        """
+        iterator = iter(iterable)
+        seconds, items = 0.0, 0
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                seconds += time.perf_counter() - start
+            items += 1
+            yield item
+        self.record(stage, seconds, items)
+
+    def record_hand(self, hand_id: str, seconds: float):
+        if len(self._slowest) < self.n_slowest:
+            heapq.heappush(self._slowest, (seconds, hand_id))
+        elif self._slowest and seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (seconds, hand_id))
+
+    def merge(self, other: "Instrumentation") -> "Instrumentation":
+        for stage in other.seconds:
+            self.record(stage, other.seconds[stage], other.items[stage], other.calls[stage])
+        for seconds, hand_id in other._slowest:
+            self.record_hand(hand_id, seconds)
+        return self
+
+    def stages(self) -> pd.DataFrame:
+        """
+        one row per stage in pipeline order: calls, items, seconds, items per second and milliseconds per call
+        """
+        table = pd.DataFrame({"calls": pd.Series(self.calls, dtype="int64"), "items": pd.Series(self.items, dtype="int64"),
+                              "seconds": pd.Series(self.seconds, dtype="float64")}, index=list(self.seconds))
+        table["items/s"] = table["items"] / table["seconds"].where(table["seconds"] > 0)
+        table["ms/call"] = 1000 * table["seconds"] / table["calls"].where(table["calls"] > 0)
+        table.index.name = "stage"
+        return table
+
+    def slowest_hands(self) -> pd.DataFrame:
+        """
+        the slowest hands to build, slowest first
+        """
+        slowest = sorted(self._slowest, reverse=True)
+        return pd.DataFrame({"id": [hand_id for _, hand_id in slowest], "seconds": [seconds for seconds, _ in slowest]})
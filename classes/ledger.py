@@ -0,0 +1,72 @@
+import numpy as np
+from array import array
+
+
+class BalanceLedger:
+    """
+    sparse record of stack changes, one (hand index, player, delta) row per player of every logged hand
+
+    players who sat out a hand cost nothing. The per-hand and cumulative series of a player are built
+    with NumPy on first request and cached until the ledger changes.
+    """
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self):
+        self.n_hands = 0
+        self.hand_index = array("q")
+        self.player_index = array("i")
+        self.deltas = array("q")
+        self.players = []
+        self._player_ids = dict()
+        self._cache = dict()
+
+    def _player_id(self, name: str) -> int:
+        try:
+            return self._player_ids[name]
+        except KeyError:
+            self._player_ids[name] = len(self.players)
+            self.players.append(name)
+            return len(self.players) - 1
+
+    def add_hand(self, changes: dict[str, int]):
+        """
+        log the next hand, changes is the stack change of every player in it
+        """
+        for name, delta in changes.items():
+            self.hand_index.append(self.n_hands)
+            self.player_index.append(self._player_id(name))
+            self.deltas.append(delta)
+        self.n_hands += 1
+        self._cache.clear()
+
+    def _columns(self):
+        if "columns" not in self._cache:
+            self._cache["columns"] = (np.array(self.hand_index, dtype=np.int64), np.array(self.player_index, dtype=np.int64),
+                                      np.array(self.deltas, dtype=np.int64))
+        return self._cache["columns"]
+
+    def balance(self, *names: str) -> np.ndarray:
+        """
+        the summed stack change of names in every logged hand, 0 where none of them played
+        """
+        if ("balance", names) not in self._cache:
+            balance = np.zeros(self.n_hands, dtype=np.int64)
+            ids = [self._player_ids[name] for name in names if name in self._player_ids]
+            if ids:
+                hand_index, player_index, deltas = self._columns()
+                rows = np.isin(player_index, ids)
+                np.add.at(balance, hand_index[rows], deltas[rows])
+            self._cache[("balance", names)] = balance
+        return self._cache[("balance", names)]
+
+    def winnings(self, *names: str) -> np.ndarray:
+        """
+        accumulated winnings of names after every logged hand
+        """
+        if ("winnings", names) not in self._cache:
+            self._cache[("winnings", names)] = np.cumsum(self.balance(*names))
+        return self._cache[("winnings", names)]
+
+    def __len__(self):
+        return self.n_hands
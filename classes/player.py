@@ -1,4 +1,6 @@
-from .utils import raw_attributes, player_attributes, describe_holdings
+from .utils import raw_attributes, player_attributes, player_attribute_ratios, describe_holdings
+from .ledger import BalanceLedger
+from .window import RollingStats
 from tabulate import tabulate
 import numpy as np
 import seaborn as sns
@@ -9,9 +11,10 @@ class Player:
 
     raw_stats = raw_attributes()
     player_stats = player_attributes()
+    ratios = player_attribute_ratios()
     _actions = ["Call", "Donk", "Bet", "Raise", "Check-Raise", "PFR", "3-Bet", "4-Bet", "5-Bet", "5-Bet+", "C-Bet", "2-Barrel", "3-Barrel"]
 
-    def __init__(self, name) -> None:
+    def __init__(self, name, ledger: BalanceLedger = None, window: int = None) -> None:
         self.n_hands_tracked = 0
         for attribute in self.raw_stats:
             setattr(self, f"_{attribute}", 0)
@@ -21,35 +24,41 @@ class Player:
             setattr(self, attribute, None)
         self.name = name
         self.hands = dict()
-        self.balance_history = []
-        self.accumulated_winnings = []
+        self._action_index = dict()
+        self._position_index = dict()
+        self.ledger = ledger
+        self.identities = []
+        self.rolling = RollingStats(window) if window else None
 
     def reset(self):
-        self.__init__(self.name)
+        self.__init__(self.name, self.ledger, self.rolling.window if self.rolling else None)
+
+    @property
+    def rolling_profile(self):
+        """
+        every player attribute over the last window hands after each hand the player played
+        """
+        assert self.rolling, "Rolling stats are not tracked, create the Session with a window"
+        return self.rolling.series()
+
+    @property
+    def balance_history(self):
+        return self.ledger.balance(*self.identities) if self.ledger else np.zeros(0, dtype=np.int64)
+
+    @property
+    def accumulated_winnings(self):
+        return self.ledger.winnings(*self.identities) if self.ledger else np.zeros(0, dtype=np.int64)
     
     def update_profile(self):
-        self.vpip = self._divide(self._vpip, self.n_hands_tracked)
-        self.wtsd = self._divide(self._wtsd, self._join_flop)
-        self.pfr = self._divide(self._pfr, self.n_hands_tracked)
-        self.af = self._divide(self._attack, self._defend)
-        self.three_bet = self._divide(self._three_bet, self._call_pfr + self._fold_to_pfr + self._three_bet)
-        self.four_bet = self._divide(self._four_bet, self._call_three_bet + self._fold_to_three_bet + self._four_bet)
-        self.five_bet = self._divide(self._five_bet, self._call_four_bet + self._fold_to_four_bet + self._five_bet)
-        self.c_bet = self._divide(self._c_bet, self._preflop_lead)
-        self.double_barrel = self._divide(self._double_barrel, self._c_bet)
-        self.triple_barrel = self._divide(self._triple_barrel, self._double_barrel)
-        self.fold_to_pfr = self._divide(self._fold_to_pfr, self._three_bet + self._call_pfr + self._fold_to_pfr)
-        self.fold_to_three_bet = self._divide(self._fold_to_three_bet, self._four_bet + self._call_three_bet + self._fold_to_three_bet)
-        self.fold_to_four_bet = self._divide(self._fold_to_four_bet, self._five_bet + self._call_four_bet + self._fold_to_four_bet)
-        self.fold_to_c = self._divide(self._fold_to_c, self._raise_against_c + self._call_c + self._fold_to_c)
-        self.fold_to_double = self._divide(self._fold_to_double, self._raise_against_double + self._call_double + self._fold_to_double)
-        self.fold_to_triple = self._divide(self._fold_to_triple, self._raise_against_triple + self._call_triple + self._fold_to_triple)
-        self.check_raise = self._divide(self._check_raise, self._call_without_checkraise)
-        
-        if self.balance_history:
-            self.accumulated_winnings.append(self.balance_history[0])
-            for balance in self.balance_history[1:]:
-                self.accumulated_winnings.append(self.accumulated_winnings[-1] + balance)
+        self.update_stats()
+
+    def update_stats(self):
+        for attribute, (numerator, denominator) in self.ratios.items():
+            setattr(self, attribute, self._divide(sum(self._counter(stat) for stat in numerator),
+                                                  sum(self._counter(stat) for stat in denominator)))
+
+    def _counter(self, stat: str) -> int:
+        return getattr(self, stat if stat == "n_hands_tracked" else f"_{stat}")
 
     @staticmethod
     def _divide(num1, num2):
@@ -90,41 +99,43 @@ class Player:
         for attribute in self.raw_stats:
             print(f"{attribute}: {getattr(self, f'_{attribute}')}")
     
+    def record_hand(self, hand_id: str, holdings, seat: int, n_players: int, actions: list[str]):
+        """
+        keep the holdings of a revealed hand, indexed by every action taken and by the seat, both
+        from the start (0, 1, ...) and from the end (-1 is the last seat) of the hand's players.
+        seat is None when the player could not be placed
+        """
+        self.hands[hand_id] = {"hand": holdings, "position": seat, "n_players": n_players, "actions": actions}
+        for action in set(actions):
+            self._action_index.setdefault(action, set()).add(hand_id)
+        if seat is not None:
+            for position in (seat, seat - n_players):
+                self._position_index.setdefault(position, set()).add(hand_id)
+
+    def set_hands(self, records: dict[str, dict]):
+        """
+        replace the recorded hands by records, {hand id: {"hand", "position", "n_players", "actions"}}
+        """
+        self.hands, self._action_index, self._position_index = dict(), dict(), dict()
+        for hand_id, record in records.items():
+            self.record_hand(hand_id, record["hand"], record["position"], record["n_players"], record["actions"])
+
+    def _match_action(self, keyword: str) -> set[str]:
+        action = keyword[1:] if keyword.startswith("!") else keyword
+        assert action in self._actions, f"Supported search keyword:\n{self._actions}"
+        hands = self._action_index.get(action, set())
+        return self.hands.keys() - hands if keyword.startswith("!") else hands
+
     def find_hands(self, *descriptor, position=None):
-        result = list()
+        if not descriptor:
+            return []
+        result = set(self.hands) if position is None else set(self._position_index.get(position, ()))
         for d in descriptor:
-            _result = list()
-            id_list = result if result else self.hands.keys()
-            if "|" in d:
-                ors = d.replace(" ", "").split("|")
-                for _d in ors:
-                    if _d.startswith("!"):
-                        assert _d[1:] in self._actions, f"Supported search keyword:\n{self._actions}"
-                    else:
-                        assert _d in self._actions, f"Supported search keyword:\n{self._actions}"
-                    for id in id_list:
-                        if _d.startswith("!") and _d[1:] not in self.hands[id]["actions"]:
-                            if (position and self.hands[id]["position"][position] == 1) or not position:
-                                _result.append(id)
-                        elif not _d.startswith("!") and _d in self.hands[id]["actions"]:
-                            if (position and self.hands[id]["position"][position] == 1) or not position:
-                                _result.append(id)
-                _result = list(set(_result))
-
-            else:
-                if d.startswith("!"):
-                    assert d[1:] in self._actions, f"Supported search keyword:\n{self._actions}"
-                else:
-                    assert d in self._actions, f"Supported search keyword:\n{self._actions}"
-                for id in id_list:
-                    if d.startswith("!") and d[1:] not in self.hands[id]["actions"]:
-                        if (position and self.hands[id]["position"][position] == 1) or not position:
-                            _result.append(id)
-                    elif not d.startswith("!") and d in self.hands[id]["actions"]:
-                        if (position and self.hands[id]["position"][position] == 1) or not position:
-                             _result.append(id)
-            result = _result
-        return result
+            matched = set()
+            for keyword in d.replace(" ", "").split("|"):
+                matched |= self._match_action(keyword)
+            result &= matched
+        return [id for id in self.hands if id in result]
     
     def plot_hand_chart(self, hand_ids, show_frequency=False, title=None):
         hand_to_index = dict()
@@ -0,0 +1,144 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import Callable
+from .bet_history import ACTIONS
+from .cards import rank_of, suit_of
+
+STREETS = ("preflop", "flop", "turn", "river")
+_SEARCH_ACTIONS = ACTIONS[2:]
+_NUMERIC = {"pot": "pot", "preflop pot": "preflop_pot", "flop pot": "flop_pot", "turn pot": "turn_pot",
+            "players": "num_players", "sb": "sb", "bb": "bb", "ante": "ante"}
+_FLAGS = {"board paired": "board_paired", "board monotone": "board_monotone", "board flush": "board_flush",
+          "own hand suited": "own_suited", "own hand paired": "own_paired"}
+_OPERATORS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+              "=": np.equal, "==": np.equal, "!=": np.not_equal}
+_TOKEN_PATTERN = re.compile(r'\(|\)|"[^"]*"|[^\s()]+')
+
+
+def hand_features(hands: list) -> pd.DataFrame:
+    """
+    one row per hand: id, blinds, number of players, pot at the end of every street, the last street dealt
+    (0 preflop to 3 river), board and own hand features, and a boolean column per player for
+    "in_hand:", "won:" and "showed:" and per search keyword for "action:"
+    """
+    rows, names, actions = [], dict(), {action: np.zeros(len(hands), dtype=bool) for action in _SEARCH_ACTIONS}
+    membership = {"in_hand": [], "won": [], "showed": []}
+    for i, hand in enumerate(hands):
+        board = list(hand._runouts[0] + hand._runouts[2] + hand._runouts[4])
+        ranks, suits = [rank_of(card) for card in board], [suit_of(card) for card in board]
+        own = hand._own_hand
+        rows.append((hand.id, hand.sb, hand.bb, hand.ante, hand.num_players, hand.pot, hand._preflop_pot,
+                     hand._flop_pot, hand._turn_pot, (len(board) > 0) + (len(board) > 3) + (len(board) > 4),
+                     len(set(ranks)) < len(ranks), len(board) >= 3 and len(set(suits[:3])) == 1,
+                     any(suits.count(suit) >= 3 for suit in set(suits)),
+                     own is not None and suit_of(own[0]) == suit_of(own[1]),
+                     own is not None and rank_of(own[0]) == rank_of(own[1])))
+        for kind, players in (("in_hand", hand.players), ("won", hand.winner), ("showed", hand.revealed_holdings)):
+            membership[kind].extend((i, names.setdefault(name, len(names))) for name in players)
+        for descriptor in hand.bet_history.descriptors():
+            if descriptor["action"] in actions:
+                actions[descriptor["action"]][i] = True
+
+    features = pd.DataFrame(rows, columns=["id", "sb", "bb", "ante", "num_players", "pot", "preflop_pot", "flop_pot",
+                                           "turn_pot", "street", "board_paired", "board_monotone", "board_flush",
+                                           "own_suited", "own_paired"])
+    columns = dict()
+    for kind, cells in membership.items():
+        matrix = np.zeros((len(hands), len(names)), dtype=bool)
+        if cells:
+            matrix[tuple(np.array(cells).T)] = True
+        columns.update({f"{kind}:{name}": matrix[:, j] for name, j in names.items()})
+    columns.update({f"action:{action}": mask for action, mask in actions.items()})
+    return pd.concat([features, pd.DataFrame(columns, index=features.index)], axis=1)
+
+
+def _column(features: pd.DataFrame, column: str) -> np.ndarray:
+    if column in features:
+        return features[column].to_numpy(dtype=bool)
+    return np.zeros(len(features), dtype=bool)
+
+
+def _predicate(words: list[str]) -> Callable[[pd.DataFrame], np.ndarray]:
+    text = " ".join(words)
+    lowered = text.lower()
+    if text in _SEARCH_ACTIONS:
+        return lambda features: _column(features, f"action:{text}")
+    for suffix, kind in ((" in hand", "in_hand"), (" won", "won"), (" showed", "showed")):
+        if lowered.endswith(suffix) and len(text) > len(suffix):
+            name = text[:-len(suffix)]
+            return lambda features: _column(features, f"{kind}:{name}")
+    match = re.fullmatch(r"went to (flop|turn|river)", lowered)
+    if match:
+        street = STREETS.index(match.group(1))
+        return lambda features: features["street"].to_numpy() >= street
+    if lowered in _FLAGS:
+        column = _FLAGS[lowered]
+        return lambda features: features[column].to_numpy(dtype=bool)
+    match = re.fullmatch(r"stakes (\d+(?:\.\d+)?)/(\d+(?:\.\d+)?)", lowered)
+    if match:
+        sb, bb = float(match.group(1)), float(match.group(2))
+        return lambda features: (features["sb"].to_numpy() == sb) & (features["bb"].to_numpy() == bb)
+    match = re.fullmatch(r"(.+?) (>=|<=|!=|==|=|>|<) (\d+(?:\.\d+)?)(bb)?", lowered)
+    if match and match.group(1) in _NUMERIC:
+        column, operator, value = _NUMERIC[match.group(1)], _OPERATORS[match.group(2)], float(match.group(3))
+        if match.group(4):
+            return lambda features: operator(features[column].to_numpy(), value * features["bb"].to_numpy())
+        return lambda features: operator(features[column].to_numpy(), value)
+    raise AssertionError(f'Unsupported query "{text}". Supported:\n'
+                         f'{list(_SEARCH_ACTIONS)}, "<name> in hand|won|showed", "went to flop|turn|river", '
+                         f'{list(_FLAGS)}, "stakes <sb>/<bb>", '
+                         f'"{"|".join(_NUMERIC)} <op> <number>[bb]", combined with and, or, not and parentheses')
+
+
+def compile_query(expression: str) -> Callable[[pd.DataFrame], np.ndarray]:
+    """
+    compile a query such as "pot > 40bb and (Player3 in hand or not went to river)" into a function
+    mapping a hand_features table to a boolean mask. and binds tighter than or, keywords are case
+    insensitive while names and action keywords are not, quote names that contain spaces or keywords
+    """
+    tokens = _TOKEN_PATTERN.findall(expression)
+    position = 0
+
+    def peek():
+        return tokens[position].lower() if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        terms = [parse_and()]
+        while peek() == "or":
+            take()
+            terms.append(parse_and())
+        return terms[0] if len(terms) == 1 else lambda features: np.logical_or.reduce([term(features) for term in terms])
+
+    def parse_and():
+        terms = [parse_not()]
+        while peek() == "and":
+            take()
+            terms.append(parse_not())
+        return terms[0] if len(terms) == 1 else lambda features: np.logical_and.reduce([term(features) for term in terms])
+
+    def parse_not():
+        if peek() == "not":
+            take()
+            term = parse_not()
+            return lambda features: ~term(features)
+        if peek() == "(":
+            take()
+            term = parse_or()
+            assert peek() == ")", f'Unbalanced parentheses in query "{expression}"'
+            take()
+            return term
+        words = []
+        while peek() not in (None, "and", "or", "(", ")"):
+            words.append(take().strip('"'))
+        assert words, f'Incomplete query "{expression}"'
+        return _predicate(words)
+
+    query = parse_or()
+    assert position == len(tokens), f'Unexpected "{tokens[position]}" in query "{expression}"'
+    return query
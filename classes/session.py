@@ -1,52 +1,295 @@
-from .hand import Entry, Hand
+from .hand import Entry, Hand, STAT_COLUMNS, stat_matrix, _LAZY_GROUPS
 from .player import Player
-from typing import Union
-from .utils import hand_segmentor, EntryList, raw_attributes, player_attributes, player_attribute_titles
+from typing import Callable, Iterable, Iterator, Union
+from .table import EntryTable
+from .follower import LogFollower
+from .cache import HandCache
+from .ledger import BalanceLedger
+from .query import hand_features, compile_query
+from . import export
+from .store import HandStore
+from .accumulator import StatAccumulator, _seat_key
+from .window import RollingStats
+from .instrumentation import Instrumentation
+from .utils import iter_hands, iter_entries_from_csv, chunk_segmentor, EntryList, raw_attributes, player_attributes, player_attribute_titles
+import numpy as np
 import pandas as pd
+import glob
 import json
+import os
+import time
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 import seaborn as sns
 import matplotlib.pyplot as plt
 from matplotlib.transforms import blended_transform_factory
 sns.set_theme()
 
+
+def _build_hands(entries: Union[Iterable[Union[Entry, str]], EntryTable], lazy=False):
+    """
+    segment one log into Hands, returning (hands, admin entries, entries of errored hands)
+
+    module level so that it can run in a worker process, the result pickles compactly since
+    the entries of an EntryTable are views that share one table. Lazy hands are only indexed,
+    so their errors only show when they are analyzed
+    """
+    if isinstance(entries, list) and entries and isinstance(entries[0], str):
+        entries = EntryTable(entries)
+    hands, admin_entries, errored = [], [], []
+    for hand in iter_hands(entries, admin_entries):
+        try:
+            hands.append(Hand(hand, lazy=lazy))
+        except KeyError:
+            errored.append(hand)
+    return hands, admin_entries, errored
+
+
+def _load_file(path: str, lazy=False):
+    return _build_hands(EntryTable(iter_entries_from_csv(path, return_as_entry=False)), lazy=lazy)
+
+
+def _build_hands_instrumented(entries: Union[Iterable[Union[Entry, str]], EntryTable], lazy=False):
+    """
+    _build_hands timing the segmentation, every Hand step and every hand, returned with the result as an
+    Instrumentation so that it also works in a worker process
+    """
+    instrumentation = Instrumentation()
+    if isinstance(entries, list) and entries and isinstance(entries[0], str):
+        with instrumentation.stage("classify", len(entries)):
+            entries = EntryTable(entries)
+    hands, admin_entries, errored = [], [], []
+    steps = {step: 0.0 for step in ["index", *_LAZY_GROUPS]}
+    for hand in instrumentation.timed(iter_hands(entries, admin_entries), "segment"):
+        start = time.perf_counter()
+        try:
+            built = Hand(hand, lazy=True)
+            last = time.perf_counter()
+            steps["index"] += last - start
+            if not lazy:
+                for method, attributes in _LAZY_GROUPS.items():
+                    getattr(built, attributes[0])
+                    now = time.perf_counter()
+                    steps[method] += now - last
+                    last = now
+            hands.append(built)
+        except KeyError:
+            errored.append(hand)
+        instrumentation.record_hand(hand[0].meta, time.perf_counter() - start)
+    for step, seconds in steps.items():
+        if step == "index" or not lazy:
+            instrumentation.record(f"hand {step.replace('_read_', '')}", seconds, len(hands), len(hands))
+    return (hands, admin_entries, errored), instrumentation
+
+
+def _load_file_instrumented(path: str, lazy=False):
+    instrumentation = Instrumentation()
+    start = time.perf_counter()
+    table = EntryTable(instrumentation.timed(iter_entries_from_csv(path, return_as_entry=False), "read csv"))
+    instrumentation.record("classify", time.perf_counter() - start - instrumentation.seconds["read csv"], len(table))
+    result, built = _build_hands_instrumented(table, lazy)
+    return result, instrumentation.merge(built)
+
+
 class Session:
 
     hand_attributes = raw_attributes()
     _actions = ["Call", "Donk", "Bet", "Raise", "Check-Raise", "PFR", "3-Bet", "4-Bet", "5-Bet", "5-Bet+", "C-Bet", "2-Barrel", "3-Barrel"]
     
-    def __init__(self, own_id=None) -> None:
+    def __init__(self, own_id=None, window=None, interactive=True) -> None:
+        """
+        window keeps the stats of every player over their last window hands too, see RollingStats.
+        interactive=False never prompts: new names get a profile of their own and a missing own_id raises
+        """
         self.hands = []
         self.entries = []
-        self.players = dict(_average_=Player("_average_"))
+        self.ledger = BalanceLedger()
+        self.identity_stats = StatAccumulator()
+        self.window = window
+        self._rolling_stale = False
+        self.players = dict(_average_=Player("_average_", window=window))
         self.admin_entries = EntryList([])
+        self._admin_walked = 0
         self.name_map = dict()
         self.own_id = own_id
+        self.interactive = interactive
         self._session_id = None
         self._id_to_hand = dict()
+        self._analyzed = 0
+        self._action_index = None
+        self._features = None
+        self.store = None
+        self.instrumentation = None
         
-    def load_entries(self, *entries: list[Union[list[Entry], list[str]]], reset=False):
+    def load_entries(self, *entries: Union[Iterable[Union[Entry, str]], EntryTable], reset=False, workers=1, hands_per_chunk=1000, lazy=False):
+        """
+        workers=1, the default as for load_files, builds the hands in this process. Other values split each
+        log into chunks of hands_per_chunk hands and build the chunks in a pool of worker processes
+        (workers=None uses every core). lazy=True only indexes the hands, see Hand
+        """
         if reset:
             self.hands, self.entries = [], []
-        for ent in entries:
-            if isinstance(ent[0], str):
-                ent = [Entry(entry) for entry in ent]
-            hands, admin_entries = hand_segmentor(ent, return_admin=True)
-            for i, hand in enumerate(hands):
-                try:
-                    hand = Hand(hand)
-                    self.hands.append(hand)
-                    self._id_to_hand[hand.id] = len(self.hands) - 1
-                except KeyError:
-                    print(f"\nSkipped errored hand below:")
-                    for entry in hand:
-                        print(entry)
-            self.admin_entries.extend(admin_entries)
-            self.init_players()
+            self._analyzed = 0
+            self._action_index = None
+            self._features = None
+        build = _build_hands if self.instrumentation is None else _build_hands_instrumented
+        if workers == 1:
+            for ent in entries:
+                self._add_hands(*self._measured(build(ent, lazy=lazy)))
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for ent in entries:
+                hands, admin_entries, errored = [], [], []
+                chunks = chunk_segmentor(ent if isinstance(ent, EntryTable) else self._classify(ent), hands_per_chunk)
+                for result in executor.map(build, chunks, [lazy] * len(chunks)):
+                    result = self._measured(result)
+                    hands.extend(result[0])
+                    admin_entries.extend(result[1])
+                    errored.extend(result[2])
+                self._add_hands(hands, admin_entries, errored)
+
+    def load_files(self, paths: Union[str, Iterable[str]], workers=1, reset=False, cache: Union[HandCache, str] = None, lazy=False,
+                   progress: Callable[[str, int], None] = None):
+        """
+        load pokernow csv logs, optionally parsing and building hands in a pool of worker processes
+
+        paths is a list of csv files or a directory of them. workers=1, the default as for load_entries,
+        loads in this process. Other values hand every file to a worker (workers=None uses every core).
+        Each file is merged as soon as it and the files before it are parsed, in the order of paths, so
+        the session and the errored hands reported are the same as load_entries() on the files one after
+        another. With a cache (a HandCache or its directory) unchanged files are loaded from their parsed
+        artifact and only new or modified files are parsed. lazy=True only indexes the hands, see Hand.
+        progress(path, n_hands) is called as each file is merged
+        """
+        if isinstance(paths, str) and os.path.isdir(paths):
+            paths = sorted(glob.glob(os.path.join(paths, "*.csv")))
+        elif isinstance(paths, str):
+            paths = [paths]
+        paths = list(paths)
+        if isinstance(cache, str):
+            cache = HandCache(cache)
+        if reset:
+            self.hands, self.entries = [], []
+            self._analyzed = 0
+            self._action_index = None
+            self._features = None
+
+        with self._stage("cache load", len(paths)) if cache else nullcontext():
+            digests = [cache.digest(path) for path in paths] if cache else [None] * len(paths)
+            results = [cache.load(digest, lazy) for digest in digests] if cache else [None] * len(paths)
+        to_parse = [path for path, result in zip(paths, results) if result is None]
+        load = _load_file if self.instrumentation is None else _load_file_instrumented
+        if workers == 1 or len(to_parse) <= 1:
+            self._merge(paths, digests, results, (load(path, lazy) for path in to_parse), cache, lazy, progress)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                self._merge(paths, digests, results, executor.map(load, to_parse, [lazy] * len(to_parse)), cache, lazy, progress)
+
+    def _merge(self, paths: list[str], digests: list, results: list, parsed: Iterator, cache: HandCache, lazy: bool, progress):
+        # cached results are already in results, the others come out of parsed in the order of paths
+        for path, digest, result in zip(paths, digests, results):
+            if result is None:
+                result = self._measured(next(parsed))
+                if cache:
+                    cache.store(path, digest, result, lazy)
+            if progress:
+                progress(path, len(result[0]))
+            self._add_hands(*result)
+
+    def instrument(self, callback: Callable[[str, float, int], None] = None, n_slowest=10) -> Instrumentation:
+        """
+        record wall time, calls and items per stage of every later load and log, per Hand step and for the
+        n_slowest hands into a new Instrumentation, see Instrumentation.stages() and slowest_hands().
+        callback(stage, seconds, items) is called as each batch is recorded. Set instrumentation to None to stop
+        """
+        self.instrumentation = Instrumentation(callback, n_slowest)
+        return self.instrumentation
+
+    def _measured(self, result):
+        # instrumented loaders return their Instrumentation next to the result
+        if self.instrumentation is None:
+            return result
+        result, instrumentation = result
+        self.instrumentation.merge(instrumentation)
+        return result
+
+    def _classify(self, entries: Iterable[Union[Entry, str]]) -> EntryTable:
+        # the table is built here before it is split between the workers, timed as the workers time theirs
+        start = time.perf_counter()
+        table = EntryTable(entry if isinstance(entry, str) else entry.raw for entry in entries)
+        if self.instrumentation is not None:
+            self.instrumentation.record("classify", time.perf_counter() - start, len(table))
+        return table
+
+    def _stage(self, stage: str, items=1):
+        return nullcontext() if self.instrumentation is None else self.instrumentation.stage(stage, items)
+
+    def attach(self, store: Union[HandStore, str]):
+        """
+        write the hands of the session, and every hand loaded later, to a HandStore (or the SQLite file
+        at a path), and answer find_hands, players_profile and hand id lookups from it. Own hands are stored
+        under own_id, which is asked for now if it was not given
+        """
+        self.store = HandStore(store) if isinstance(store, str) else store
+        self._drop_errored()
+        if self.hands:
+            self._resolve_own_id(required=False)
+            self._mark_own_player(self.hands)
+        self.store.add_hands(self.hands)
+
+    def _add_hands(self, hands: list[Hand], admin_entries: list[Entry], errored: list[list[Entry]]):
+        with self._stage("add hands", len(hands)):
+            for hand in hands:
+                self.hands.append(hand)
+                self._id_to_hand[hand.id] = len(self.hands) - 1
+            self._report_errored(errored)
+            if admin_entries:
+                self.admin_entries.extend(admin_entries)
+                self.init_players()
+            if self.store is not None and hands:
+                self._resolve_own_id(required=False)
+                self._mark_own_player(hands)
+                self.store.add_hands(hands)
+
+    @staticmethod
+    def _report_errored(errored: list[list[Entry]]):
+        for hand in errored:
+            print(f"\nSkipped errored hand below:")
+            for entry in hand:
+                print(entry)
+
+    def _drop_errored(self):
+        """
+        analyze the lazy hands not analyzed yet, dropping the ones that cannot be parsed like an eager load
+        would have. Called by everything that reads the analysis of all hands
+        """
+        errored = []
+        for hand in self.hands[self._analyzed:]:
+            try:
+                hand.analyze()
+            except KeyError:
+                errored.append(hand)
+        self._analyzed = len(self.hands) - len(errored)
+        if errored:
+            errored_ids = set(id(hand) for hand in errored)
+            self.hands = [hand for hand in self.hands if id(hand) not in errored_ids]
+            self._id_to_hand = {hand.id: i for i, hand in enumerate(self.hands)}
+            self._action_index = None
+            self._features = None
+            self._report_errored([hand.entries for hand in errored])
+
+    def follow(self, path: str, csv_format=None) -> LogFollower:
+        """
+        tail a log that is still being written, call poll() or run() on the returned LogFollower to ingest new hands
+        """
+        return LogFollower(self, path, csv_format=csv_format)
 
     def __getitem__(self, index: Union[str, int]):
         if isinstance(index, int):
             return self.hands[index]
         elif isinstance(index, str):
+            if index not in self._id_to_hand and self.store is not None:
+                return self.store.hand(index)
             return self.hands[self._id_to_hand[index]]
         else:
             raise IndexError("Index with hand number of hand ID")
@@ -55,20 +298,28 @@ class Session:
         return len(self.hands)
     
     def init_players(self, players=None):
+        """
+        without players, create the profiles of the names that joined in the admin entries added since the last call
+        """
         if players:
             assert isinstance(players, list)
         if not players:
-            assert self.hands, "Pass in the list of players to manually initialize. To initialize automatically from session log, use load_entries() first"
-            for entry in self.admin_entries:
+            assert self.hands or self.admin_entries, "Pass in the list of players to manually initialize. To initialize automatically from session log, use load_entries() first"
+            new_entries = self.admin_entries[self._admin_walked:]
+            self._admin_walked = len(self.admin_entries)
+            for entry in new_entries:
                 if entry.descriptor == "join":
                     if entry.name[0][0] in self.name_map:
                         try:
                             self.players[self.name_map[entry.name[0][0]]]
                         except KeyError:
-                            self.players[self.name_map[entry.name[0][0]]] = Player(self.name_map[entry.name[0][0]])
+                            self.players[self.name_map[entry.name[0][0]]] = Player(self.name_map[entry.name[0][0]], self.ledger, self.window)
                         continue
                     elif entry.name[0][0] in self.players:
                         self.name_map[entry.name[0][0]] = entry.name[0][0]
+                    elif not self.interactive:
+                        self.name_map[entry.name[0][0]] = entry.name[0][0]
+                        self.players[entry.name[0][0]] = Player(entry.name[0][0], self.ledger, self.window)
                     else:
                         print(f"Current profiles: {[name for name in self.players]}")
                         in_rename = True
@@ -80,14 +331,14 @@ class Session:
                                 try:
                                     self.players[name]
                                 except KeyError:
-                                    self.players[name] = Player(name)
+                                    self.players[name] = Player(name, self.ledger, self.window)
                                 in_rename = False
                             elif rename.lower() == "n":
                                 self.name_map[entry.name[0][0]] = entry.name[0][0]
                                 try:
                                     self.players[entry.name[0][0]]
                                 except KeyError:
-                                    self.players[entry.name[0][0]] = Player(entry.name[0][0])
+                                    self.players[entry.name[0][0]] = Player(entry.name[0][0], self.ledger, self.window)
                                 in_rename = False
                             else:
                                 pass
@@ -96,7 +347,7 @@ class Session:
                 try:
                     self.players[name]
                 except KeyError:
-                    self.players[name] = Player(name)
+                    self.players[name] = Player(name, self.ledger, self.window)
     
     def update_player_profiles(self):
         for name in self.players:
@@ -107,13 +358,32 @@ class Session:
         if reset:
             for name in self.players:
                 self.players[name].reset()
+            self.ledger.reset()
+            self.identity_stats = StatAccumulator()
+            self._rolling_stale = False
         
-        for hand in self.hands:
-            self.log_hand_stats(hand)
+        self._drop_errored()
+        self._resolve_own_id()
+        with self._stage("log counts", len(self.hands)):
+            self._log_counts(self.hands)
+        with self._stage("log hand records", len(self.hands)):
+            for hand in self.hands:
+                self._log_hand_records(hand)
 
     def log_hand_stats(self, hand: Hand):
-        # record own player ID
-        if not self.own_id:
+        """
+        log one more hand, own hands are not recorded until own_id has joined
+        """
+        self._resolve_own_id(required=False)
+        with self._stage("log counts"):
+            self._log_counts([hand])
+        with self._stage("log hand records"):
+            self._log_hand_records(hand)
+
+    def _resolve_own_id(self, required=True):
+        # record own player ID, required=False leaves _own_alt_ids empty until own_id shows up in the logs
+        if not self.own_id and (required or self.interactive):
+            assert self.interactive, "Own ID not stored. Pass own_id to the Session"
             while True:
                 id = input("Own ID not stored. Input own user ID: ")
                 if id in self.players:
@@ -121,77 +391,173 @@ class Session:
                 else:
                     print("ID not found in logs")
             self.own_id = id
-        self._own_alt_ids = [key for key in self.name_map if self.name_map[key] == self.own_id]
-        assert len(self._own_alt_ids) >= 1
-        
+        self._own_alt_ids = [key for key in self.name_map if self.name_map[key] == self.own_id] if self.own_id else []
+        assert len(self._own_alt_ids) >= 1 or not required, f"Own ID {self.own_id} not found in the logs or name map"
+
+    def _log_counts(self, hands: list[Hand]):
+        """
+        add the raw stats of hands to the players: one count matrix for all hands, summed per player
+        """
+        matrix, names = stat_matrix(hands)
+        self._log_identity_counts(hands, matrix)
+        profiles = list(self.players)
+        rows = self._profile_rows(names, profiles)
+        totals = np.zeros((len(profiles), len(STAT_COLUMNS)), dtype=np.int64)
+        np.add.at(totals, rows, matrix)
+        totals[profiles.index("_average_")] += matrix.sum(axis=0)
+        if self.window:
+            self._log_rolling(hands, matrix, rows, profiles, self.ledger.n_hands)
+
+        attributes = [stat if stat == "n_hands_tracked" else f"_{stat}" for stat in STAT_COLUMNS]
+        for name, total in zip(profiles, totals.tolist()):
+            player = self.players[name]
+            for attribute, value in zip(attributes, total):
+                if value:
+                    setattr(player, attribute, getattr(player, attribute) + value)
+
+    def _profile_rows(self, names: list[str], profiles: list[str]) -> np.ndarray:
+        profile_index = {name: i for i, name in enumerate(profiles)}
+        return np.fromiter((profile_index[self.name_map[name]] for name in names), dtype=np.int64, count=len(names))
+
+    def _log_identity_counts(self, hands: list[Hand], matrix: np.ndarray):
+        """
+        the same counts keyed by raw identity, which apply_name_map regroups when aliases change
+        """
+        identities = [identity for hand in hands for identity in hand.identities]
+        index = {identity: i for i, identity in enumerate(dict.fromkeys(identities))}
+        rows = np.fromiter((index[identity] for identity in identities), dtype=np.int64, count=len(identities))
+        totals = np.zeros((len(index), len(STAT_COLUMNS)), dtype=np.int64)
+        np.add.at(totals, rows, matrix)
+        self.identity_stats.add_counts(dict(zip(index, totals)))
+        for identity in index:
+            player = self.players[self._profile_of(identity)]
+            if identity not in player.identities:
+                player.identities.append(identity)
+
+    def _profile_of(self, identity: str) -> str:
+        name = identity.split(" @ ")[0]
+        return self.name_map.get(name, name)
+
+    def apply_name_map(self):
+        """
+        regroup the logged stats, hand records and winnings of every raw identity (name @ hash) under the
+        profiles of the current name_map, without analyzing any hand again. Rolling windows are replayed from
+        the stat rows of the logged hands, see _regroup_rolling
+        """
+        grouped = self.identity_stats.group(self._profile_of)
+        members = dict()
+        for identity in self.identity_stats.counts:
+            members.setdefault(self._profile_of(identity), []).append(identity)
+        for name in grouped.counts:
+            if name not in self.players:
+                self.players[name] = Player(name, self.ledger, self.window)
+        # profiles whose every identity now maps elsewhere are dropped
+        for name in [name for name, player in self.players.items() if player.identities and name not in members]:
+            del self.players[name]
+        empty = np.zeros(len(STAT_COLUMNS), dtype=np.int64)
+        for name, player in self.players.items():
+            if name == "_average_":
+                continue
+            for stat, value in zip(STAT_COLUMNS, grouped.counts.get(name, empty).tolist()):
+                setattr(player, stat if stat == "n_hands_tracked" else f"_{stat}", value)
+            player.identities = members.get(name, [])
+            records = grouped.hands.get(name, dict())
+            player.set_hands({hand_id: records[hand_id] for hand_id in sorted(records, key=lambda hand_id: self._id_to_hand.get(hand_id, len(self.hands)))})
+        if self.window:
+            self._regroup_rolling()
+
+    def _regroup_rolling(self):
+        """
+        rebuild the rolling window of every profile from the stat rows of the logged hands. When those are
+        no longer the hands of the session (more were loaded or logged twice since) the windows are left
+        stale and rolling_stats() raises until log_session_stats() is called again
+        """
+        self._rolling_stale = self.ledger.n_hands != len(self.hands)
+        if self._rolling_stale:
+            return
+        for player in self.players.values():
+            player.rolling = RollingStats(self.window)
+        if self.hands:
+            matrix, names = stat_matrix(self.hands)
+            profiles = list(self.players)
+            self._log_rolling(self.hands, matrix, self._profile_rows(names, profiles), profiles, 0)
+
+    def _log_rolling(self, hands: list[Hand], matrix: np.ndarray, rows: np.ndarray, profiles: list[str], first_hand: int):
+        """
+        push the per-hand stat rows of every profile into its rolling window, aliases in one hand summed.
+        first_hand is the session hand index of hands[0]
+        """
+        n_seats = np.fromiter((len(hand.players) for hand in hands), dtype=np.int64, count=len(hands))
+        hand_of_row = np.repeat(np.arange(len(hands)), n_seats) + first_hand
+        for i, name in enumerate(profiles):
+            taken = np.ones(len(rows), dtype=bool) if name == "_average_" else rows == i
+            if not taken.any():
+                continue
+            played = hand_of_row[taken]
+            starts = np.flatnonzero(np.diff(played, prepend=-1))
+            self.players[name].rolling.extend(played[starts], np.add.reduceat(matrix[taken], starts))
+
+    def _mark_own_player(self, hands: list[Hand]):
         # pass own player ID into each hand
-        for name in hand.players:
-            if name in self._own_alt_ids:
-                hand.own_player_id = name
-
-        # log raw stats into players in this session
-        for attribute in self.hand_attributes:
-            if not getattr(hand, attribute):
-                pass
-            elif isinstance(getattr(hand, attribute), str):
-                self._add_to_attribute(self.players[self.name_map[getattr(hand, attribute)]], f"_{attribute}", 1)
-                self._add_to_attribute(self.players["_average_"], f"_{attribute}", 1)
-            elif isinstance(getattr(hand, attribute), list):
-                for name in getattr(hand, attribute):
-                    name = self.name_map[name]
-                    self._add_to_attribute(self.players[name], f"_{attribute}", 1)
-                    self._add_to_attribute(self.players["_average_"], f"_{attribute}", 1)
-            elif isinstance(getattr(hand, attribute), dict):
-                for name, value in getattr(hand, attribute).items():
-                    name = self.name_map[name]
-                    if isinstance(value, int):
-                        self._add_to_attribute(self.players[name], f"_{attribute}", value)
-                        self._add_to_attribute(self.players["_average_"], f"_{attribute}", value)
-                    elif isinstance(value, dict):
-                        for att, ele in value.items():
-                            self._add_to_attribute(self.players[name], f"_{att}", ele)
-                            self._add_to_attribute(self.players["_average_"], f"_{att}", ele)
+        for hand in hands:
+            for name in hand.players:
+                if name in self._own_alt_ids:
+                    hand.own_player_id = name
+
+    def _log_hand_records(self, hand: Hand):
+        self._mark_own_player([hand])
 
         # record all revealed hands
         if hand.revealed_holdings:
             for name, holdings in hand.revealed_holdings.items():
-                position = [0 for _ in hand.players]
-                position[hand.players.index(name)] = 1
-                self.players[self.name_map[name]].hands[hand.id] = {"hand": holdings, "position": position, "actions": [history["descriptor"]["action"] for history in hand.bet_history.values() if history["stage"] != "end" and history["descriptor"]["name"] == name]}
+                seat = hand.players.index(name)
+                player = self.players[self.name_map[name]]
+                record = {"hand": holdings, "position": seat, "n_players": hand.num_players,
+                          "actions": [descriptor["action"] for descriptor in hand.bet_history.descriptors() if descriptor["name"] == name]}
+                self.identity_stats.add_record(hand.identities[seat], hand.id, record)
+                # aliases of one profile in the same hand, the lowest seat is kept like StatAccumulator.group does
+                if hand.id not in player.hands or _seat_key(record) < _seat_key(player.hands[hand.id]):
+                    player.record_hand(hand.id, holdings, seat, hand.num_players, record["actions"])
         
         # record own hand
-        if hand.own_hand:
-            position = [0 for _ in hand.players]
-            for i, name in enumerate(hand.players):
-                if name in self._own_alt_ids:
-                    position[i] = 1
-            self.players[self.own_id].hands[hand.id] = {"hand": hand.own_hand, "position": position, "actions": [history["descriptor"]["action"] for history in hand.bet_history.values() if history["stage"] != "end" and history["descriptor"]["name"] in self._own_alt_ids]}
-
-        # update _average_ dummy player
-        for name in hand.players:
-            self.players[self.name_map[name]].n_hands_tracked += 1
-            self.players["_average_"].n_hands_tracked += 1
+        if hand.own_hand and self._own_alt_ids:
+            seat = next((i for i, name in enumerate(hand.players) if name in self._own_alt_ids), None)
+            self.players[self.own_id].record_hand(hand.id, hand.own_hand, seat, hand.num_players,
+                                                  [descriptor["action"] for descriptor in hand.bet_history.descriptors() if descriptor["name"] in self._own_alt_ids])
+            self.identity_stats.add_record(self.own_id if seat is None else hand.identities[seat], hand.id, self.players[self.own_id].hands[hand.id])
 
         # track player balance
-        player_update_track = {name: False for name in self.players if name != "_average_"}
-        for name in hand.players:
-            player_update_track[self.name_map[name]] = True
-            self.players[self.name_map[name]].balance_history.append(hand.stack_changes[name])
-        for name in player_update_track:
-            if not player_update_track[name]:
-                self.players[name].balance_history.append(0)
-    
-    @staticmethod
-    def _add_to_attribute(_class, attribute, value):
-        original_stat = getattr(_class, attribute)
-        setattr(_class, attribute, original_stat + value)
+        self.ledger.add_hand(dict(zip(hand.identities, hand.stack_changes.values())))
     
+    def _stored_profiles(self) -> dict[str, Player]:
+        """
+        players with the raw stats of every hand in the attached store, grouped by name_map
+        """
+        raw = self.store.raw_stats()
+        totals = raw.groupby(lambda name: self.name_map.get(name, name), sort=False).sum()
+        totals.loc["_average_"] = raw.sum()
+        order = [name for name in self.players if name in totals.index] + [name for name in totals.index if name not in self.players]
+        return StatAccumulator({name: totals.loc[name].to_numpy() for name in order}).players()
+
+    def accumulator(self, raw=False) -> StatAccumulator:
+        """
+        the raw stats and hand records of every player, to merge with the accumulators of other sessions.
+        raw=True keys them by raw identity instead, for shards to be aliased after merging
+        """
+        if raw:
+            return StatAccumulator().merge(self.identity_stats)
+        return StatAccumulator.from_players(self.players)
+
     @property
     def players_profile(self):
+        """
+        the stats of every player, computed in the attached store when there is one
+        """
         header = player_attribute_titles()
         index = []
         table = []
-        for name, profile in self.players.items():
+        players = self._stored_profiles() if self.store is not None else self.players
+        for name, profile in players.items():
             if name != "_average_":
                 index.append(f"({profile.n_hands_tracked}) {name}")
             else:
@@ -215,6 +581,9 @@ class Session:
         elif isinstance(_map, str):
             with open(_map, "r") as f:
                 self.name_map = json.load(f)
+        self._admin_walked = 0  # names joined so far may map to profiles that do not exist yet
+        if self.identity_stats.counts:
+            self.apply_name_map()
     
     def export_name_map(self, path):
         with open(path, "w") as f:
@@ -227,7 +596,7 @@ class Session:
         tf = blended_transform_factory(plt.gca().transAxes, plt.gca().transAxes)
         plt.text(0.85, -0.25, f"{self.__len__()} hands", fontsize=10, color='gray', transform=tf)
 
-    def plot_winnings(self, include=None, exclude=None):
+    def _select_players(self, include=None, exclude=None) -> list[str]:
         assert not (include and exclude), "Both inclusion and exclusion set"
         if include:
             assert isinstance(include, list) or isinstance(include, str)
@@ -244,57 +613,121 @@ class Session:
             for name in exclude:
                 assert name in players, f"ID {name} not found in session. Session players: {[player for player in self.players if player != '_average_'] }"
                 players.remove(name)  
-        winnings = {player: self.players[player].accumulated_winnings for player in players}
-        winnings_df = pd.DataFrame(winnings, index=list(range(len(self))))
+        return players
+
+    def winnings(self, include=None, exclude=None) -> pd.DataFrame:
+        """
+        accumulated winnings of every selected player after each logged hand
+        """
+        players = self._select_players(include, exclude)
+        return pd.DataFrame({player: self.players[player].accumulated_winnings for player in players},
+                            index=pd.RangeIndex(len(self.ledger), name="hand"))
+
+    def plot_winnings(self, include=None, exclude=None):
+        winnings_df = self.winnings(include, exclude)
         fig, ax = plt.subplots(figsize=(13, 10))
         sns.lineplot(data=winnings_df, palette="tab10", ax=ax, linewidth=2.5, dashes=False)
         ax.axhline(y=0, color='black', linestyle='--', alpha=0.5)
         ax.set_ylabel("Net Stack Change")
         ax.set_xlabel("Hands")
+
+    def rolling_stats(self, stat="VPIP", include=None, exclude=None) -> pd.DataFrame:
+        """
+        one of player_attribute_titles() over each player's last window hands, a column per player
+        indexed by logged hand, NaN where the player sat out
+        """
+        assert self.window, "Rolling stats are not tracked, create the Session with a window"
+        assert not self._rolling_stale, "Rolling stats predate the name map, call log_session_stats() again"
+        assert stat in player_attribute_titles(), f"Supported stats:\n{player_attribute_titles()}"
+        players = self._select_players(include, exclude)
+        return pd.DataFrame({player: self.players[player].rolling_profile[stat] for player in players},
+                            index=pd.RangeIndex(len(self.ledger), name="hand"))
+
+    def plot_rolling(self, stat="VPIP", include=None, exclude=None):
+        rolling = self.rolling_stats(stat, include, exclude).ffill()
+        fig, ax = plt.subplots(figsize=(13, 10))
+        sns.lineplot(data=rolling, palette="tab10", ax=ax, linewidth=2.5, dashes=False)
+        ax.set_ylabel(f"{stat} (last {self.window} hands)")
+        ax.set_xlabel("Hands")
     
+    def to_arrow(self):
+        """
+        (actions, hands) pyarrow tables with one row per betting layer and one per hand, requires pyarrow
+        """
+        self._drop_errored()
+        return export.to_arrow(self.hands)
+
+    def to_parquet(self, directory: str):
+        """
+        write the to_arrow tables to actions.parquet and hands.parquet in directory, requires pyarrow
+        """
+        self._drop_errored()
+        export.to_parquet(self.hands, directory)
+
+    @property
+    def features(self) -> pd.DataFrame:
+        """
+        the per-hand feature table queries run on, see hand_features. Built on first use and extended
+        with the hands loaded since
+        """
+        self._drop_errored()
+        indexed, features = self._features if self._features else (0, None)
+        if features is None or indexed < len(self.hands):
+            new = hand_features(self.hands[indexed:])
+            if features is None:
+                features = new
+            else:
+                features = pd.concat([features, new], ignore_index=True)
+                flags = [column for column in features if ":" in column]
+                features[flags] = features[flags].fillna(False).astype(bool)
+            self._features = (len(self.hands), features)
+        return features
+
+    def query(self, expression: str) -> list[str]:
+        """
+        ids of the hands matching a query expression, e.g.
+        session.query("pot > 40bb and Player3 in hand and not went to river"), see compile_query
+        """
+        features = self.features
+        return features["id"][compile_query(expression)(features)].tolist()
+
+    def _index_actions(self) -> dict[str, np.ndarray]:
+        """
+        inverted index from every search keyword to the sorted indexes of the hands it occurs in,
+        built on first search and extended with the hands loaded since
+        """
+        indexed, index = self._action_index if self._action_index else (0, {action: np.zeros(0, dtype=np.int64) for action in self._actions})
+        if indexed < len(self.hands):
+            new = {action: [] for action in self._actions}
+            for i in range(indexed, len(self.hands)):
+                for action in set(descriptor["action"] for descriptor in self.hands[i].bet_history.descriptors()):
+                    if action in new:
+                        new[action].append(i)
+            index = {action: np.concatenate((index[action], np.array(new[action], dtype=np.int64))) for action in index}
+            self._action_index = (len(self.hands), index)
+        return index
+
+    def _match_action(self, keyword: str) -> np.ndarray:
+        action = keyword[1:] if keyword.startswith("!") else keyword
+        assert action in self._actions, f"Supported search keyword:\n{self._actions}"
+        mask = np.zeros(len(self.hands), dtype=bool)
+        mask[self._index_actions()[action]] = True
+        return ~mask if keyword.startswith("!") else mask
+
     def find_hands(self, *descriptor):
-        result = list()
+        """
+        ids of the hands matching every descriptor, a descriptor is an action keyword, "!" negates it and
+        "|" joins alternatives, e.g. find_hands("PFR", "C-Bet | !Call"). Searches the attached store when there is one
+        """
+        if self.store is not None:
+            return self.store.find_hands(*descriptor)
+        if not descriptor:
+            return []
+        self._drop_errored()
+        result = np.ones(len(self.hands), dtype=bool)
         for d in descriptor:
-            _result = list()
-            hand_list = result if result else self.hands
-            if "|" in d:
-                ors = d.replace(" ", "").split("|")
-                for _d in ors:
-                    if _d.startswith("!"):
-                        assert _d[1:] in self._actions, f"Supported search keyword:\n{self._actions}"
-                    else:
-                        assert _d in self._actions, f"Supported search keyword:\n{self._actions}"
-                    for ele in hand_list:
-                        if isinstance(ele, Hand) and _d.startswith("!") \
-                        and _d[1:] not in [history["descriptor"]["action"] for history in ele.bet_history.values() if history["stage"] != "end"]:
-                            _result.append(ele.id)
-                        elif isinstance(ele, Hand) and not _d.startswith("!") \
-                        and _d in [history["descriptor"]["action"] for history in ele.bet_history.values() if history["stage"] != "end"]:
-                            _result.append(ele.id)
-                        elif isinstance(ele, str) and _d.startswith("!") \
-                        and _d[1:] not in [history["descriptor"]["action"] for history in self[ele].bet_history.values() if history["stage"] != "end"]:
-                            _result.append(ele)
-                        elif isinstance(ele, str) and not _d.startswith("!") \
-                        and _d in [history["descriptor"]["action"] for history in self[ele].bet_history.values() if history["stage"] != "end"]:
-                            _result.append(ele)
-                _result = list(set(_result))
-            else:
-                if d.startswith("!"):
-                    assert d[1:] in self._actions, f"Supported search keyword:\n{self._actions}"
-                else:
-                    assert d in self._actions, f"Supported search keyword:\n{self._actions}"
-                for ele in hand_list:
-                    if isinstance(ele, Hand) and d.startswith("!") \
-                    and d[1:] not in [history["descriptor"]["action"] for history in ele.bet_history.values() if history["stage"] != "end"]:
-                        _result.append(ele.id)
-                    elif isinstance(ele, Hand) and not d.startswith("!") \
-                    and d in [history["descriptor"]["action"] for history in ele.bet_history.values() if history["stage"] != "end"]:
-                        _result.append(ele.id)
-                    elif isinstance(ele, str) and d.startswith("!") \
-                    and d[1:] not in [history["descriptor"]["action"] for history in self[ele].bet_history.values() if history["stage"] != "end"]:
-                        _result.append(ele)
-                    elif isinstance(ele, str) and not d.startswith("!") \
-                    and d in [history["descriptor"]["action"] for history in self[ele].bet_history.values() if history["stage"] != "end"]:
-                        _result.append(ele)
-            result = _result
-        return result
+            matched = np.zeros(len(self.hands), dtype=bool)
+            for keyword in d.replace(" ", "").split("|"):
+                matched |= self._match_action(keyword)
+            result &= matched
+        return [self.hands[i].id for i in np.flatnonzero(result)]
@@ -0,0 +1,127 @@
+import json
+import sqlite3
+import pandas as pd
+from .hand import Hand, STAT_COLUMNS, stat_matrix
+from .table import EntryTable
+from .bet_history import STAGES, ACTIONS
+from .cache import PARSER_VERSION
+from .export import action_columns
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS hands (position INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, sb INTEGER, bb INTEGER,
+                                  ante INTEGER, num_players INTEGER, pot INTEGER, own_player_id TEXT, entries TEXT);
+CREATE TABLE IF NOT EXISTS seats (hand_id TEXT, seat INTEGER, player TEXT, stack_change INTEGER,
+                                  {", ".join(f"{stat} INTEGER" for stat in STAT_COLUMNS)});
+CREATE TABLE IF NOT EXISTS actions (hand_id TEXT, layer INTEGER, stage TEXT, player TEXT, action TEXT,
+                                    described_player TEXT, amount INTEGER, pot_before INTEGER);
+CREATE TABLE IF NOT EXISTS holdings (hand_id TEXT, player TEXT, card1 INTEGER, card2 INTEGER, own INTEGER);
+CREATE INDEX IF NOT EXISTS seats_player ON seats (player);
+CREATE INDEX IF NOT EXISTS seats_hand ON seats (hand_id);
+CREATE INDEX IF NOT EXISTS actions_action ON actions (action, hand_id);
+CREATE INDEX IF NOT EXISTS actions_hand ON actions (hand_id);
+CREATE INDEX IF NOT EXISTS actions_player ON actions (player);
+CREATE INDEX IF NOT EXISTS holdings_player ON holdings (player);
+"""
+
+
+class HandStore:
+    """
+    SQLite database of parsed hands, for archives too large to rebuild a Session from every time
+
+    every hand is kept with its log lines, per-seat stat contributions and stack changes, betting
+    actions and shown or own holdings, indexed by hand id, player and action. The stats depend on the
+    parser, so a database written by another PARSER_VERSION has to be rebuilt.
+    """
+    def __init__(self, path="pnparser.sqlite") -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        stored = self.connection.execute("SELECT count(*) FROM sqlite_master WHERE name = 'hands'").fetchone()[0]
+        assert not stored or version == PARSER_VERSION, \
+            f"{path} was written by parser version {version}, current is {PARSER_VERSION}. Delete it and store the logs again"
+        self.connection.executescript(_SCHEMA)
+        self.connection.execute(f"PRAGMA user_version = {PARSER_VERSION}")
+
+    def add_hands(self, hands: list[Hand]) -> int:
+        """
+        store the hands not stored yet, skipping the ones that cannot be parsed. Returns how many were added
+        """
+        stored = set()
+        new = []
+        for hand in hands:
+            if hand.id in stored or hand.id in self:
+                continue
+            try:
+                hand.analyze()
+            except KeyError:
+                continue
+            stored.add(hand.id)
+            new.append(hand)
+        if not new:
+            return 0
+
+        matrix, names = stat_matrix(new)
+        seats = [(hand.id, seat, name, change) for hand in new for seat, (name, change) in enumerate(hand.stack_changes.items())]
+        actions = action_columns(new)
+        action_names = actions["names"] + [None]
+        holdings = [(hand.id, name, *cards, 0) for hand in new for name, cards in hand.revealed_holdings.items()]
+        holdings += [(hand.id, hand.own_player_id, *hand.own_hand, 1) for hand in new if hand.own_hand]
+        with self.connection:
+            self.connection.executemany("INSERT INTO hands (id, sb, bb, ante, num_players, pot, own_player_id, entries) "
+                                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                        ((hand.id, hand.sb, hand.bb, hand.ante, hand.num_players, hand.pot, hand.own_player_id,
+                                          json.dumps([entry.raw for entry in hand.entries])) for hand in new))
+            self.connection.executemany(f"INSERT INTO seats VALUES ({', '.join('?' * (4 + len(STAT_COLUMNS)))})",
+                                        (seat + tuple(row) for seat, row in zip(seats, matrix.tolist())))
+            self.connection.executemany("INSERT INTO actions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                        ((new[hand].id, layer, STAGES[stage], action_names[player], ACTIONS[action],
+                                          action_names[described], amount, pot_before)
+                                         for hand, layer, stage, player, action, described, amount, pot_before
+                                         in zip(*(actions[column].tolist() for column in ("hand", "layer", "stage", "player", "action",
+                                                                                          "described", "amount", "pot_before")))))
+            self.connection.executemany("INSERT INTO holdings VALUES (?, ?, ?, ?, ?)", holdings)
+        return len(new)
+
+    def hand(self, hand_id: str) -> Hand:
+        row = self.connection.execute("SELECT entries, own_player_id FROM hands WHERE id = ?", (hand_id,)).fetchone()
+        if row is None:
+            raise KeyError(hand_id)
+        hand = Hand(list(EntryTable(json.loads(row[0]))))
+        hand.own_player_id = row[1]
+        return hand
+
+    def find_hands(self, *descriptor) -> list[str]:
+        """
+        ids of the stored hands matching every descriptor, with the syntax of Session.find_hands
+        """
+        if not descriptor:
+            return []
+        terms, parameters = [], []
+        for d in descriptor:
+            alternatives = []
+            for keyword in d.replace(" ", "").split("|"):
+                action = keyword[1:] if keyword.startswith("!") else keyword
+                assert action in ACTIONS[2:], f"Supported search keyword:\n{list(ACTIONS[2:])}"
+                matching = "SELECT hand_id FROM actions WHERE action = ?"
+                alternatives.append(f"SELECT * FROM (SELECT id FROM hands EXCEPT {matching})" if keyword.startswith("!") else matching)
+                parameters.append(action)
+            terms.append(f"SELECT * FROM ({' UNION '.join(alternatives)})")
+        query = f"SELECT id FROM hands WHERE id IN ({' INTERSECT '.join(terms)}) ORDER BY position"
+        return [row[0] for row in self.connection.execute(query, parameters)]
+
+    def raw_stats(self) -> pd.DataFrame:
+        """
+        the STAT_COLUMNS of every stored player name summed over their hands, one row per name
+        """
+        query = f"SELECT player, {', '.join(f'SUM({stat})' for stat in STAT_COLUMNS)} FROM seats GROUP BY player ORDER BY MIN(rowid)"
+        rows = self.connection.execute(query).fetchall()
+        return pd.DataFrame([row[1:] for row in rows], columns=list(STAT_COLUMNS), index=[row[0] for row in rows], dtype="int64")
+
+    def __contains__(self, hand_id: str):
+        return self.connection.execute("SELECT 1 FROM hands WHERE id = ?", (hand_id,)).fetchone() is not None
+
+    def __len__(self):
+        return self.connection.execute("SELECT count(*) FROM hands").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,189 @@
+from array import array
+from typing import Iterable
+from .entry import Entry, DESCRIPTOR_LOOKUP, classify
+
+DESCRIPTORS = tuple(dict.fromkeys(DESCRIPTOR_LOOKUP.values())) + ("admin",)
+DESCRIPTOR_CODES = {descriptor: code for code, descriptor in enumerate(DESCRIPTORS)}
+STAGES = ("preflop", "flop", "turn", "river")
+STAGE_CODES = {stage: code for code, stage in enumerate(STAGES)}
+
+_AMOUNT_DESCRIPTORS = {"call", "raise", "bet", "uncalled", "collect", "ANTE", "SB", "BB", "join", "add stack"}
+_CARD_DESCRIPTORS = {"flop", "turn", "river", "rabbit", "own hand", "show"}
+_AMOUNT_CODES = frozenset(DESCRIPTOR_CODES[descriptor] for descriptor in _AMOUNT_DESCRIPTORS)
+_CARD_CODES = frozenset(DESCRIPTOR_CODES[descriptor] for descriptor in _CARD_DESCRIPTORS)
+_PARSED_DESCRIPTORS = {"start", "stack count"}
+_PARSED_CODES = frozenset(DESCRIPTOR_CODES[descriptor] for descriptor in _PARSED_DESCRIPTORS)
+_START = DESCRIPTOR_CODES["start"]
+
+
+class EntryTable:
+    """
+    struct-of-arrays store of log entries, one row per log line
+
+    raw text lives in one shared utf-8 buffer addressed by offsets, descriptors are small
+    int codes, player names are interned, amounts are ints and cards are packed card ids.
+    The hand id of "start" rows and the stacks of "stack count" rows are parsed once into
+    parsed, and those rows keep their index into it in amounts.
+    Indexing a row returns a TableEntry, a thin Entry-compatible view over the row.
+    """
+    def __init__(self, entries: Iterable[str] = ()) -> None:
+        self.buffer = bytearray()
+        self.offsets = array("Q", [0])
+        self.descriptors = array("B")
+        self.players = array("i")
+        self.n_names = array("B")
+        self.amounts = array("q")
+        self.card_offsets = array("I", [0])
+        self.cards = array("B")
+        self.stages = array("b")
+        self.parsed = []
+        self.identities = []
+        self._identity_index = dict()
+        self._names = []
+        self.extend(entries)
+
+    def append(self, entry: str):
+        name, descriptor, meta = classify(entry)
+        self.buffer += entry.encode("utf-8")
+        self.offsets.append(len(self.buffer))
+        self.descriptors.append(DESCRIPTOR_CODES[descriptor])
+        self.n_names.append(min(len(name), 255))
+        self.players.append(self._intern(name[0]) if name else -1)
+        if descriptor in _PARSED_DESCRIPTORS:
+            self.amounts.append(len(self.parsed))
+            self.parsed.append(meta)
+        else:
+            self.amounts.append(meta if descriptor in _AMOUNT_DESCRIPTORS else 0)
+        if descriptor in _CARD_DESCRIPTORS:
+            self.cards.extend(meta)
+        self.card_offsets.append(len(self.cards))
+        self.stages.append(-1)
+
+    def extend(self, entries: Iterable[str]):
+        for entry in entries:
+            self.append(entry)
+
+    def _intern(self, name: list) -> int:
+        identity = " @ ".join(name)
+        try:
+            return self._identity_index[identity]
+        except KeyError:
+            self._identity_index[identity] = len(self.identities)
+            self.identities.append(identity)
+            self._names.append(name)
+            return len(self.identities) - 1
+
+    def take(self, start: int, stop: int) -> "EntryTable":
+        """
+        copy rows [start, stop) into a new, self-contained table
+        """
+        table = EntryTable()
+        base, card_base = self.offsets[start], self.card_offsets[start]
+        table.buffer = self.buffer[base:self.offsets[stop]]
+        table.offsets = array("Q", (offset - base for offset in self.offsets[start:stop + 1]))
+        table.descriptors = self.descriptors[start:stop]
+        table.players = self.players[start:stop]
+        table.n_names = self.n_names[start:stop]
+        table.amounts = self.amounts[start:stop]
+        for row, code in enumerate(table.descriptors):
+            if code in _PARSED_CODES:
+                table.amounts[row] = len(table.parsed)
+                table.parsed.append(self.parsed[self.amounts[start + row]])
+        table.card_offsets = array("I", (offset - card_base for offset in self.card_offsets[start:stop + 1]))
+        table.cards = self.cards[card_base:self.card_offsets[stop]]
+        table.stages = self.stages[start:stop]
+        table.identities = list(self.identities)
+        table._identity_index = dict(self._identity_index)
+        table._names = list(self._names)
+        return table
+
+    def hand_starts(self) -> list[int]:
+        return [row for row, code in enumerate(self.descriptors) if code == _START]
+
+    def raw(self, row: int) -> str:
+        return self.buffer[self.offsets[row]:self.offsets[row + 1]].decode("utf-8")
+
+    def descriptor(self, row: int) -> str:
+        return DESCRIPTORS[self.descriptors[row]]
+
+    def name(self, row: int) -> list:
+        n_names = self.n_names[row]
+        if n_names == 0:
+            return []
+        elif n_names == 1:
+            return [self._names[self.players[row]]]
+        return Entry._get_name(self.raw(row))
+
+    def meta(self, row: int):
+        code = self.descriptors[row]
+        if code in _AMOUNT_CODES:
+            return self.amounts[row]
+        elif code in _CARD_CODES:
+            return self.cards[self.card_offsets[row]:self.card_offsets[row + 1]].tolist()
+        elif code == _START:
+            return self.parsed[self.amounts[row]]
+        elif code in _PARSED_CODES:
+            return dict(self.parsed[self.amounts[row]])
+        return None
+
+    def __getitem__(self, row: int):
+        if isinstance(row, slice):
+            return [TableEntry(self, i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("EntryTable index out of range")
+        return TableEntry(self, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield TableEntry(self, row)
+
+    def __len__(self):
+        return len(self.descriptors)
+
+    def __str__(self):
+        return "\n".join(self.raw(row) for row in range(len(self)))
+
+
+class TableEntry:
+    """
+    Entry-compatible view over one row of an EntryTable
+    """
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: EntryTable, row: int) -> None:
+        self.table = table
+        self.row = row
+
+    @property
+    def raw(self):
+        return self.table.raw(self.row)
+
+    @property
+    def descriptor(self):
+        return DESCRIPTORS[self.table.descriptors[self.row]]
+
+    @property
+    def name(self):
+        return self.table.name(self.row)
+
+    @property
+    def meta(self):
+        return self.table.meta(self.row)
+
+    @property
+    def stage(self):
+        code = self.table.stages[self.row]
+        return STAGES[code] if code >= 0 else None
+
+    @stage.setter
+    def stage(self, stage):
+        self.table.stages[self.row] = STAGE_CODES[stage] if stage is not None else -1
+
+    @property
+    def pot(self):
+        return None
+
+    def __str__(self) -> str:
+        return self.raw
@@ -1,10 +1,13 @@
-import pandas as pd
+import csv
+import os
 from treys import Evaluator
 from treys.lookup import LookupTable
 from phevaluator import evaluate_cards
 from phevaluator.card import Card
-from typing import Union
+from typing import Iterable, Iterator, Union
 from . import Entry
+from .cards import RANKS, SUIT_SYMBOLS, RED_SUITS, to_id, rank_of, suit_of
+from .table import EntryTable, TableEntry, DESCRIPTOR_CODES
 from colorama import Fore, Style
 
 class EntryList(list):
@@ -24,57 +27,123 @@ class COLOR:
     reset = Style.RESET_ALL
 
 def pretty_cards(*cards: Union[int, str, Card]):
-    """_summary_
+    """
+    render cards (card ints, "As"-style strings or phevaluator Cards) as colored suit/rank strings
+    """
+    RED = "\033[1;31m"
+    BLACK = "\033[0;0m"
+
+    def _get_pretty_card(card: int):
+        suit = suit_of(card)
+        pretty = SUIT_SYMBOLS[suit] + RANKS[rank_of(card)]
+        return RED + pretty + BLACK if RED_SUITS[suit] else pretty
+
+    return ", ".join([_get_pretty_card(to_id(card)) for card in cards])
 
-    Returns:
-        _type_: _description_
+def read_lines_reversed(path: str, chunk_size=1 << 20) -> Iterator[str]:
     """
+    yield the lines of a text file from last to first, reading it backwards in blocks of chunk_size bytes
+    """
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            size = min(chunk_size, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + remainder).split(b"\n")
+            remainder = lines[0]  # possibly cut in half by the block boundary
+            for line in reversed(lines[1:]):
+                if line.strip(b"\r"):
+                    yield line.rstrip(b"\r").decode("utf-8")
+        if remainder.strip(b"\r"):
+            yield remainder.rstrip(b"\r").decode("utf-8")
 
-    cards = [Card(id) for id in list(map(Card.to_id, cards))]
-    
-    def _get_pretty_card(card: Card):
-        suit_unicode_lookup = {
-            "s": u"\u2660",
-            "h": u"\u2665",
-            "d": u"\u2666",
-            "c": u"\u2663",}
-        RED = "\033[1;31m"
-        BLACK = "\033[0;0m"
-        prefix = RED if card.describe_suit() in ['h', 'd'] else ''
-        postfix = BLACK if card.describe_suit() in ['h', 'd'] else ''
-        return prefix + suit_unicode_lookup[card.describe_suit()] + card.describe_rank() + postfix
-        
+def iter_entries_from_csv(path: str, return_as_entry=True, chunk_size=1 << 20) -> Iterator[Union[Entry, str]]:
+    """
+    stream the log entries of a newest-first pokernow csv export in chronological order
 
-    cards = [Card(id) for id in list(map(Card.to_id, cards))]
-    return ", ".join([_get_pretty_card(card) for card in cards])
+    the file is read backwards block by block, so only one block is held in memory at a time.
+    Assumes one record per line, which holds for pokernow exports.
+    """
+    rows = csv.reader(read_lines_reversed(path, chunk_size))
+    row = next(rows, None)
+    for next_row in rows:  # the last row read is the header
+        entry = row[0]
+        yield Entry(entry) if return_as_entry else entry
+        row = next_row
 
-def load_entries_from_csv(path: str, return_as_entry=True):
-    log_df = pd.read_csv(path)
-    entry_lists = [log_df.iloc[:, 0].tolist()[::-1]][0]  # list of log entries in chronological order
-    if return_as_entry:
-        return [Entry(entry) for entry in entry_lists]
-    else:
-        return entry_lists
+def load_entries_from_csv(path: str, return_as_entry=True, return_as_table=False):
+    entries = iter_entries_from_csv(path, return_as_entry=return_as_entry and not return_as_table)
+    if return_as_table:
+        return EntryTable(entries)
+    return list(entries)
     
-def hand_segmentor(entries: list[Union[str, Entry]], return_admin=False):
-    hands_list = []
-    current_hand = []
-    admin_entries = []
+def iter_hands(entries: Union[Iterable[Union[str, Entry]], EntryTable], admin_entries: list = None) -> Iterator[list]:
+    """
+    yield the entries of each hand as soon as the next hand starts, so entries can be streamed in
+
+    "add stack" and "join" entries are appended to admin_entries when given
+    """
+    if isinstance(entries, EntryTable):
+        yield from _iter_table_hands(entries, admin_entries)
+        return
+    current_hand = None
     for entry in entries:
         if isinstance(entry, str):
             entry = Entry(entry)
         if entry.descriptor == "start":
-            hands_list.append(current_hand)
+            if current_hand is not None:
+                yield current_hand
             current_hand = [entry]
         elif entry.descriptor not in ['add stack', 'join', 'terminate', 'admin']:
-            current_hand.append(entry)
-        elif entry.descriptor in ['add stack', 'join']:
+            if current_hand is not None:
+                current_hand.append(entry)
+        elif entry.descriptor in ['add stack', 'join'] and admin_entries is not None:
             admin_entries.append(entry)
-    hands_list.append(current_hand)
+    if current_hand is not None:
+        yield current_hand
+
+_START_CODE = DESCRIPTOR_CODES["start"]
+_ADMIN_CODES = frozenset(DESCRIPTOR_CODES[descriptor] for descriptor in ['add stack', 'join'])
+_DROPPED_CODES = frozenset(DESCRIPTOR_CODES[descriptor] for descriptor in ['terminate', 'admin'])
+
+def _iter_table_hands(table: EntryTable, admin_entries: list = None) -> Iterator[list]:
+    # segment on the descriptor codes, only creating views for the rows that are kept
+    current_hand = None
+    for row, code in enumerate(table.descriptors):
+        if code == _START_CODE:
+            if current_hand is not None:
+                yield current_hand
+            current_hand = [TableEntry(table, row)]
+        elif code in _ADMIN_CODES:
+            if admin_entries is not None:
+                admin_entries.append(TableEntry(table, row))
+        elif code not in _DROPPED_CODES and current_hand is not None:
+            current_hand.append(TableEntry(table, row))
+    if current_hand is not None:
+        yield current_hand
+
+def hand_segmentor(entries: Union[Iterable[Union[str, Entry]], EntryTable], return_admin=False):
+    admin_entries = []
+    hands_list = list(iter_hands(entries, admin_entries))
     if return_admin:
-        return hands_list[1:], admin_entries
+        return hands_list, admin_entries
     else:
-        return hands_list[1:]
+        return hands_list
+
+def chunk_segmentor(entries: Union[Iterable[Union[str, Entry]], EntryTable], hands_per_chunk=1000) -> list[EntryTable]:
+    """
+    split one log into self-contained EntryTables of up to hands_per_chunk hands, cut on "starting hand" lines
+
+    entries before the first hand stay in the first chunk, so segmenting every chunk gives the same
+    hands and admin entries as segmenting the whole log
+    """
+    if not isinstance(entries, EntryTable):
+        entries = EntryTable(entry if isinstance(entry, str) else entry.raw for entry in entries)
+    cuts = entries.hand_starts()[hands_per_chunk::hands_per_chunk]
+    bounds = [0] + cuts + [len(entries)]
+    return [entries.take(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
 
 def get_rank(cards, return_readable_rank=True) -> str:
     _evaluator = Evaluator()
@@ -140,6 +209,29 @@ def player_attributes():
                   "check_raise",]
     return attributes
 
+def player_attribute_ratios():
+    """
+    every player attribute as (numerator, denominator), each a tuple of raw counters to sum
+    """
+    ratios = {"vpip": (("vpip",), ("n_hands_tracked",)),
+              "wtsd": (("wtsd",), ("join_flop",)),
+              "pfr": (("pfr",), ("n_hands_tracked",)),
+              "af": (("attack",), ("defend",)),
+              "three_bet": (("three_bet",), ("call_pfr", "fold_to_pfr", "three_bet")),
+              "four_bet": (("four_bet",), ("call_three_bet", "fold_to_three_bet", "four_bet")),
+              "five_bet": (("five_bet",), ("call_four_bet", "fold_to_four_bet", "five_bet")),
+              "c_bet": (("c_bet",), ("preflop_lead",)),
+              "double_barrel": (("double_barrel",), ("c_bet",)),
+              "triple_barrel": (("triple_barrel",), ("double_barrel",)),
+              "fold_to_pfr": (("fold_to_pfr",), ("three_bet", "call_pfr", "fold_to_pfr")),
+              "fold_to_three_bet": (("fold_to_three_bet",), ("four_bet", "call_three_bet", "fold_to_three_bet")),
+              "fold_to_four_bet": (("fold_to_four_bet",), ("five_bet", "call_four_bet", "fold_to_four_bet")),
+              "fold_to_c": (("fold_to_c",), ("raise_against_c", "call_c", "fold_to_c")),
+              "fold_to_double": (("fold_to_double",), ("raise_against_double", "call_double", "fold_to_double")),
+              "fold_to_triple": (("fold_to_triple",), ("raise_against_triple", "call_triple", "fold_to_triple")),
+              "check_raise": (("check_raise",), ("call_without_checkraise",))}
+    return ratios
+
 def player_attribute_titles():
     title = ["VPIP", 
              "AF",
@@ -161,11 +253,10 @@ def player_attribute_titles():
     return title
 
 def describe_holdings(hand: list):
-    assert len(hand) == 2 and isinstance(hand[0], Card)
-    card1, card2 = hand
-    if card1.id_ // 4 == card2.id_ // 4:
-        return f"{card1.describe_rank()}{card2.describe_rank()}"
-    elif card1.id_ // 4 > card2.id_ // 4:
-        return f"{card1.describe_rank()}{card2.describe_rank()}{'o' if card1.describe_suit() != card2.describe_suit() else 's'}"
-    else:
-        return f"{card2.describe_rank()}{card1.describe_rank()}{'o' if card1.describe_suit() != card2.describe_suit() else 's'}"
+    assert len(hand) == 2
+    card1, card2 = map(to_id, hand)
+    rank1, rank2 = rank_of(card1), rank_of(card2)
+    if rank1 == rank2:
+        return f"{RANKS[rank1]}{RANKS[rank2]}"
+    suited = 'o' if suit_of(card1) != suit_of(card2) else 's'
+    return f"{RANKS[max(rank1, rank2)]}{RANKS[min(rank1, rank2)]}{suited}"
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from array import array
+from .hand import STAT_COLUMNS
+from .utils import player_attributes, player_attribute_ratios, player_attribute_titles
+
+_COLUMN_INDEX = {stat: i for i, stat in enumerate(STAT_COLUMNS)}
+
+
+class RollingStats:
+    """
+    raw stats of a player over their last window hands
+
+    the stat contributions of the last window hands sit in a ring buffer next to their running sums, so
+    logging a hand is one subtraction and one addition. The sums after every hand are kept, which makes
+    the rolling series of every player attribute a vectorized division.
+    """
+    def __init__(self, window=200) -> None:
+        assert window > 0
+        self.window = window
+        self.buffer = np.zeros((window, len(STAT_COLUMNS)), dtype=np.int64)
+        self.sums = np.zeros(len(STAT_COLUMNS), dtype=np.int64)
+        self.n_hands = 0
+        self.hand_index = array("q")
+        self.history = array("i")
+
+    def push(self, hand_index: int, row: np.ndarray):
+        """
+        log the STAT_COLUMNS row of one hand, hand_index is where it sits in the session
+        """
+        slot = self.n_hands % self.window
+        self.sums += row - self.buffer[slot]
+        self.buffer[slot] = row
+        self.n_hands += 1
+        self.hand_index.append(hand_index)
+        self.history.extend(self.sums.tolist())
+
+    def extend(self, hand_index: np.ndarray, rows: np.ndarray):
+        """
+        log many hands at once, the same as pushing them one by one
+        """
+        if len(rows) == 1:
+            return self.push(int(hand_index[0]), rows[0])
+        kept = min(self.n_hands, self.window)
+        previous = np.roll(self.buffer, -(self.n_hands % self.window), axis=0) if kept == self.window else self.buffer[:kept]
+        combined = np.concatenate((previous, rows))
+        cumulative = np.concatenate((np.zeros((1, len(STAT_COLUMNS)), dtype=np.int64), np.cumsum(combined, axis=0)))
+        end = np.arange(kept + 1, len(combined) + 1)
+        sums = cumulative[end] - cumulative[np.maximum(end - self.window, 0)]
+
+        total = self.n_hands + len(rows)
+        recent = combined[-self.window:]
+        self.buffer[np.arange(total - len(recent), total) % self.window] = recent
+        self.sums = sums[-1].copy()
+        self.n_hands = total
+        self.hand_index.extend(np.asarray(hand_index, dtype=np.int64).tolist())
+        self.history.extend(sums.ravel().tolist())
+
+    def series(self) -> pd.DataFrame:
+        """
+        every player attribute over the window after each logged hand, indexed by session hand index
+        """
+        sums = np.frombuffer(self.history, dtype=np.int32).reshape(-1, len(STAT_COLUMNS)) if self.history \
+            else np.zeros((0, len(STAT_COLUMNS)), dtype=np.int32)
+        columns = dict()
+        ratios = player_attribute_ratios()
+        for title, attribute in zip(player_attribute_titles(), player_attributes()[1:]):
+            numerator, denominator = ratios[attribute]
+            top = sums[:, [_COLUMN_INDEX[stat] for stat in numerator]].sum(axis=1)
+            bottom = sums[:, [_COLUMN_INDEX[stat] for stat in denominator]].sum(axis=1)
+            columns[title] = np.where(bottom > 0, top / np.maximum(bottom, 1), np.nan)
+        columns["Hands"] = sums[:, _COLUMN_INDEX["n_hands_tracked"]]
+        return pd.DataFrame(columns, index=pd.Index(np.frombuffer(self.hand_index, dtype=np.int64) if self.hand_index
+                                                    else np.zeros(0, dtype=np.int64), name="hand"))
@@ -0,0 +1,82 @@
+"""
+every parsed attribute of every hand in data/demo1.csv and data/demo2.csv against golden values written by
+the parser before the betting walk was table driven (the parent of "[user-010] Parse a hand's betting in one
+table-driven walk"), with cards as card ints. To rebuild the golden file from a checkout of that parser:
+
+    python tests/test_bet_history_parity.py <checkout>
+"""
+import gzip
+import json
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLDEN = os.path.join(ROOT, "tests", "data", "bet_history_golden.json.gz")
+LOGS = ["demo1.csv", "demo2.csv"]
+
+ATTRIBUTES = ["id", "dealer", "players", "num_players", "pot", "ante", "sb", "bb", "own_hand", "flop", "turn", "river",
+              "rabbit", "board", "revealed_holdings", "winner", "stack_changes", "_preflop_pot", "_flop_pot", "_turn_pot",
+              "starting_stacks", "player_aggression_factor"]
+NAME_STATS = ["vpip", "three_bet", "four_bet", "five_bet", "c_bet", "double_barrel", "triple_barrel", "pfr", "raise_against_c",
+              "raise_against_double", "raise_against_triple", "preflop_lead", "flop_lead", "turn_lead", "river_lead",
+              "check_raise", "call_without_checkraise", "join_flop", "wtsd", "fold_to_three_bet", "fold_to_four_bet",
+              "fold_to_pfr", "fold_to_c", "fold_to_double", "fold_to_triple", "call_three_bet", "call_four_bet", "call_pfr",
+              "call_c", "call_double", "call_triple"]
+
+
+def normalize(value):
+    if hasattr(value, "id_"):  # phevaluator Card
+        return int(value.id_)
+    if isinstance(value, dict):
+        return {str(key): normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if hasattr(value, "item"):  # numpy scalar
+        return value.item()
+    return value
+
+
+def hand_snapshot(hand) -> dict:
+    snapshot = {attribute: normalize(getattr(hand, attribute)) for attribute in ATTRIBUTES}
+    for stat in NAME_STATS:
+        names = getattr(hand, stat)
+        snapshot[stat] = sorted(names) if isinstance(names, (list, set)) else normalize(names)
+    snapshot["bet_history"] = [[stage, normalize(dict(layer))] for stage, layer in hand.bet_history.items()]
+    snapshot["descriptors"] = normalize(hand.bet_history.descriptors())
+    return snapshot
+
+
+def log_snapshots(path: str) -> list[dict]:
+    from classes import Hand
+    from classes.utils import load_entries_from_csv, hand_segmentor
+    snapshots = []
+    for entries in hand_segmentor(load_entries_from_csv(path)):
+        try:
+            hand = Hand(entries)
+        except KeyError:
+            continue
+        snapshots.append(hand_snapshot(hand))
+    return snapshots
+
+
+@pytest.fixture(scope="module")
+def golden():
+    with gzip.open(GOLDEN, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("log", LOGS)
+def test_hands_match_golden(log, golden):
+    expected = golden[log]
+    snapshots = log_snapshots(os.path.join(ROOT, "data", log))
+    assert [hand["id"] for hand in snapshots] == [hand["id"] for hand in expected]
+    for snapshot, hand in zip(snapshots, expected):
+        for attribute in hand:
+            assert snapshot[attribute] == hand[attribute], f"hand {hand['id']} {attribute}"
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(sys.argv[1]))
+    with gzip.open(GOLDEN, "wt", encoding="utf-8") as f:
+        json.dump({log: log_snapshots(os.path.join(ROOT, "data", log)) for log in LOGS}, f)
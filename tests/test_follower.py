@@ -0,0 +1,121 @@
+import csv
+import io
+import os
+import pandas as pd
+import pytest
+from classes import Session
+from classes.utils import iter_entries_from_csv
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def batch_session(lines, own_id):
+    session = Session(own_id=own_id, interactive=False)
+    session.load_entries(lines)
+    session.log_session_stats()
+    session.update_player_profiles()
+    return session
+
+
+def log_bytes(lines) -> bytes:
+    text = io.StringIO()
+    writer = csv.writer(text, lineterminator="\r\n")
+    writer.writerow(["entry"])
+    writer.writerows([line] for line in lines)
+    return text.getvalue().encode("utf-8")
+
+
+def followed_session(lines, own_id, tmp_path, chunk_size=4096):
+    """
+    follow a log of lines written chronologically in chunks of chunk_size bytes, cutting lines in half
+    """
+    data = log_bytes(lines)
+    live = tmp_path / "live.csv"
+    live.write_bytes(b"")
+    session = Session(own_id=own_id, interactive=False)
+    follower = session.follow(str(live))
+    followed = []
+    with open(live, "ab") as f:
+        for start in range(0, len(data), chunk_size):
+            f.write(data[start:start + chunk_size])
+            f.flush()
+            followed.extend(follower.poll())
+    followed.extend(follower.flush())
+    return session, followed
+
+
+@pytest.mark.parametrize("log", ["demo1.csv", "demo2.csv"])
+def test_follow_matches_batch_load(log, tmp_path):
+    lines = list(iter_entries_from_csv(os.path.join(DATA, log), return_as_entry=False))
+    batch = batch_session(lines, "Player1")
+    followed, hands = followed_session(lines, "Player1", tmp_path)
+
+    assert [hand.id for hand in hands] == [hand.id for hand in batch.hands]
+    assert followed.name_map == batch.name_map
+    assert list(followed.players) == list(batch.players)
+    pd.testing.assert_frame_equal(followed.players_raw_stats, batch.players_raw_stats)
+    pd.testing.assert_frame_equal(followed.players_profile, batch.players_profile)
+    pd.testing.assert_frame_equal(followed.winnings(), batch.winnings())
+    for name in batch.players:
+        assert followed.players[name].hands == batch.players[name].hands, name
+
+
+def test_follow_skips_errored_first_hand(tmp_path):
+    lines = list(iter_entries_from_csv(os.path.join(DATA, "demo1.csv"), return_as_entry=False))
+    first = next(i for i, line in enumerate(lines) if "collected" in line)
+    lines[first] = '"Ghost @ abcdefghij"' + lines[first][lines[first].index(" collected"):]
+    batch = batch_session(lines, "Player1")
+    followed, hands = followed_session(lines, "Player1", tmp_path)
+
+    assert len(hands) == len(batch.hands) == 250
+    assert list(followed.players) == list(batch.players)
+    pd.testing.assert_frame_equal(followed.players_raw_stats, batch.players_raw_stats)
+
+
+def assert_same_session(followed, batch):
+    assert [hand.id for hand in followed.hands] == [hand.id for hand in batch.hands]
+    pd.testing.assert_frame_equal(followed.players_raw_stats, batch.players_raw_stats)
+    pd.testing.assert_frame_equal(followed.winnings(), batch.winnings())
+
+
+def test_follow_truncated_log(tmp_path):
+    lines = list(iter_entries_from_csv(os.path.join(DATA, "demo1.csv"), return_as_entry=False))
+    data = log_bytes(lines)
+    live = tmp_path / "live.csv"
+    live.write_bytes(data)
+    session = Session(own_id="Player1", interactive=False)
+    follower = session.follow(str(live))
+    follower.poll()
+
+    with open(live, "r+b") as f:
+        f.truncate(len(data) // 2)
+    assert follower.poll() == []
+    with open(live, "ab") as f:
+        f.write(data[len(data) // 2:])
+    follower.poll()
+    follower.flush()
+    assert_same_session(session, batch_session(lines, "Player1"))
+
+
+def test_follow_replaced_log(tmp_path):
+    first = list(iter_entries_from_csv(os.path.join(DATA, "demo1.csv"), return_as_entry=False))
+    second = list(iter_entries_from_csv(os.path.join(DATA, "demo2.csv"), return_as_entry=False))
+    first = first[:[i for i, line in enumerate(first) if line.startswith("-- starting hand")][100]]
+    live = tmp_path / "live.csv"
+    live.write_bytes(log_bytes(first))
+    session = Session(own_id="Player1", interactive=False)
+    follower = session.follow(str(live))
+    follower.poll()
+    follower.flush()
+
+    replacement = tmp_path / "replacement.csv"
+    replacement.write_bytes(log_bytes(second))
+    assert os.path.getsize(replacement) >= os.path.getsize(live)
+    os.replace(replacement, live)
+    follower.poll()
+    follower.flush()
+
+    batch = Session(own_id="Player1", interactive=False)
+    batch.load_entries(first, second)
+    batch.log_session_stats()
+    assert_same_session(session, batch)
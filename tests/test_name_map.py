@@ -0,0 +1,46 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from classes import Session
+from classes.utils import iter_entries_from_csv
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+LOGS = [list(iter_entries_from_csv(os.path.join(DATA, log), return_as_entry=False)) for log in ("demo1.csv", "demo2.csv")]
+
+
+def logged_session(name_map=None, window=50):
+    session = Session(own_id="Player1", window=window, interactive=False)
+    if name_map:
+        session.load_name_map(dict(name_map))
+    session.load_entries(*LOGS)
+    session.log_session_stats()
+    session.update_player_profiles()
+    return session
+
+
+def test_realias_matches_fresh_session():
+    realiased = logged_session()
+    name_map = dict(realiased.name_map, Player4="Player2")
+    realiased.load_name_map(name_map)
+    realiased.update_player_profiles()
+    fresh = logged_session(name_map)
+
+    assert sorted(realiased.players) == sorted(fresh.players)
+    pd.testing.assert_frame_equal(realiased.players_raw_stats.sort_index(axis=1), fresh.players_raw_stats.sort_index(axis=1))
+    pd.testing.assert_frame_equal(realiased.winnings().sort_index(axis=1), fresh.winnings().sort_index(axis=1))
+    for name, player in fresh.players.items():
+        assert realiased.players[name].hands == player.hands, name
+        assert list(realiased.players[name].hands) == list(player.hands), name
+    for stat in ("VPIP", "PFR", "3-Bet"):
+        pd.testing.assert_frame_equal(realiased.rolling_stats(stat).sort_index(axis=1), fresh.rolling_stats(stat).sort_index(axis=1))
+
+
+def test_rolling_stats_after_realias_of_unlogged_hands():
+    session = logged_session()
+    session.load_entries(LOGS[0][:200])
+    session.load_name_map(dict(session.name_map, Player4="Player2"))
+    with pytest.raises(AssertionError, match="name map"):
+        session.rolling_stats()
+    session.log_session_stats()
+    assert not np.isnan(session.rolling_stats().to_numpy(dtype=float)).all()